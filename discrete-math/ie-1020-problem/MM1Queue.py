@@ -1,22 +1,13 @@
-from manim import *
-import numpy as np
+import os
 
-class Customer(Circle):
-    def __init__(self, index, **kwargs):
-        super().__init__(radius=0.3, **kwargs)
-        self.index = index
-        self.label = Text(str(index), font_size=24).move_to(self.get_center())
-        self.arrival_time = None
-        self.departure_time = None
+from manim import *
 
-    def add_label(self):
-        self.add(self.label)
+from event_trace import record_trace, save_trace
+from queue_engine import ARRIVAL, DEPARTURE, SERVICE_START
+from queue_visuals import CustomerPool, QueueLine
 
 class MM1QueueScene(Scene):
     def construct(self):
-        # Set random seed for reproducibility
-        np.random.seed(42)
-
         # Customizable parameters
         arrival_rate = 2  # λ: customers per second
         service_rate = 1.5  # μ: services per second
@@ -39,13 +30,6 @@ class MM1QueueScene(Scene):
         # Add the labels to the scene with an animation
         self.play(Write(rates_left), Write(rates_right))
 
-        # Calculate inter-arrival and service times
-        def get_inter_arrival_time():
-            return np.random.exponential(1 / arrival_rate)
-
-        def get_service_time():
-            return np.random.exponential(1 / service_rate)
-
         # Setup the queue visuals
         queue_position = LEFT * 4
         server_position = ORIGIN
@@ -67,170 +51,65 @@ class MM1QueueScene(Scene):
         departure_label = Text("Departure", font_size=24).next_to(departure_area, UP)
         self.play(Create(departure_area), Create(departure_label))
 
-        # Initialize simulation variables
-        current_time = 0
-        customer_count = 0
-        queue = []
-        server_busy = False
-        next_arrival_time = get_inter_arrival_time()
-        next_departure_time = float('inf')
-        current_customer = None  # Single customer in server
-        departing_customers = []
-        waiting_times = []  # List to store individual waiting times
-
-        # Variables for average queue length calculation
-        last_event_time = 0
-        cumulative_queue_time = 0
+        # Run the simulation headless, then play back its events
+        trace = record_trace(arrival_rate, service_rate, 1, simulation_time, seed=42)
+
+        # Optionally dump the event trace so TracePlayerScene can re-render it
+        trace_out = os.environ.get("QUEUE_TRACE_OUT")
+        if trace_out:
+            save_trace(trace_out, trace)
+
+        event_times = trace['time'].tolist()
+        event_types = trace['event'].tolist()
+        event_customers = trace['customer'].tolist()
+        event_servers = trace['server'].tolist()
+
+        customers = {}
+        # Departed customers are recycled for later arrivals
+        pool = CustomerPool(color=WHITE)
 
         # Define spacing between customers in the queue
         spacing = 0.8  # Adjust spacing as needed
 
-        # Simulation loop
-        while current_time < simulation_time:
-            if next_arrival_time <= next_departure_time:
-                # Next event is arrival
-                event_time = next_arrival_time
-                event_type = 'arrival'
-            else:
-                # Next event is departure
-                event_time = next_departure_time
-                event_type = 'departure'
-
-            # Update cumulative queue time
-            time_since_last_event = event_time - last_event_time
-            cumulative_queue_time += len(queue) * time_since_last_event
-            last_event_time = event_time
-
-            current_time = event_time
-
-            if event_type == 'arrival':
+        # Customers line up leftwards from the right border; past six the rest show as "+N"
+        queue = QueueLine(head=queue_area.get_right() + LEFT * 0.5, step=LEFT * spacing, max_visible=6)
+
+        for k, event_type in enumerate(event_types):
+            customer_id = event_customers[k]
+
+            if event_type == ARRIVAL:
                 # Handle arrival
-                customer_count += 1
-                customer = Customer(index=customer_count, color=WHITE)
-                customer.add_label()
-                customer.arrival_time = current_time  # Record arrival time
+                customer = pool.acquire(customer_id)
+                customer.arrival_time = event_times[k]  # Record arrival time
                 customer.move_to(start_position)  # Start below the queue area
+                customers[customer_id] = customer
                 self.play(FadeIn(customer))
 
-                if not server_busy:
-                    # Server is free, start service immediately
-                    server_busy = True
-                    current_customer = customer
-                    service_time = get_service_time()
-                    next_departure_time = current_time + service_time
-
-                    # Animate customer moving to server
-                    self.play(customer.animate.move_to(server_position))
-                else:
-                    # Add to queue
-                    queue.append(customer)
-
-                    # Calculate the new position in the queue
-                    queue_length = len(queue)
-                    queue_position_offset = queue_area.get_right() + LEFT * 0.5 + LEFT * spacing * (queue_length - 1)
-
+                # Customers who find the server free go straight to it on SERVICE_START
+                if event_servers[k] < 0:
                     # Animate customer joining the queue from the right border
-                    self.play(customer.animate.move_to(queue_position_offset))
-
-                # Schedule next arrival
-                inter_arrival = get_inter_arrival_time()
-                next_arrival_time = current_time + inter_arrival
-            else:
-                # Handle departure
-                if current_customer:
-                    departing_customer = current_customer
-                    departing_customer.departure_time = current_time  # Record departure time
-                    waiting_time = departing_customer.departure_time - departing_customer.arrival_time
-                    waiting_times.append(waiting_time)
-
-                    # Animate customer departing
-                    self.play(departing_customer.animate.move_to(departure_position))
-                    self.play(FadeOut(departing_customer))
-                    departing_customers.append(departing_customer)
-                    current_customer = None
-
-                if queue:
-                    # Take next customer from queue
-                    next_customer = queue.pop(0)
-                    server_busy = True
-                    current_customer = next_customer
-                    service_time = get_service_time()
-                    next_departure_time = current_time + service_time
-
-                    # Animate customer moving to server
-                    self.play(next_customer.animate.move_to(server_position))
-
-                    # Shift the remaining customers in the queue forward simultaneously
-                    shift_animations = []
-                    for i, customer in enumerate(queue):
-                        new_position = queue_area.get_right() + LEFT * 0.5 + LEFT * spacing * i
-                        shift_animations.append(customer.animate.move_to(new_position))
-                    
-                    if shift_animations:
-                        self.play(*shift_animations)
-                else:
-                    server_busy = False
-                    next_departure_time = float('inf')
-
-        # After simulation time, finish remaining departures
-        while server_busy:
-            event_time = next_departure_time
-
-            # Update cumulative queue time
-            time_since_last_event = event_time - last_event_time
-            cumulative_queue_time += len(queue) * time_since_last_event
-            last_event_time = event_time
-
-            current_time = event_time
-
-            if current_customer:
-                departing_customer = current_customer
-                departing_customer.departure_time = current_time  # Record departure time
-                waiting_time = departing_customer.departure_time - departing_customer.arrival_time
-                waiting_times.append(waiting_time)
+                    self.play(*queue.join(customer))
+            elif event_type == SERVICE_START:
+                customer = customers[customer_id]
+                shift_animations = []
+                if customer in queue:
+                    # FIFO: the customer entering service is the front of the line
+                    customer, shift_animations = queue.leave()
 
+                # Animate customer moving to server while the line moves up as one group
+                self.play(customer.animate.move_to(server_position), *shift_animations)
+            elif event_type == DEPARTURE:
                 # Animate customer departing
+                departing_customer = customers.pop(customer_id)
+                departing_customer.departure_time = event_times[k]  # Record departure time
                 self.play(departing_customer.animate.move_to(departure_position))
                 self.play(FadeOut(departing_customer))
-                departing_customers.append(departing_customer)
-                current_customer = None
-
-            if queue:
-                # Take next customer from queue
-                next_customer = queue.pop(0)
-                server_busy = True
-                current_customer = next_customer
-                service_time = get_service_time()
-                next_departure_time = current_time + service_time
+                pool.release(departing_customer)
 
-                # Animate customer moving to server
-                self.play(next_customer.animate.move_to(server_position))
-
-                # Shift the remaining customers in the queue forward simultaneously
-                shift_animations = []
-                for i, customer in enumerate(queue):
-                    new_position = queue_area.get_right() + LEFT * 0.5 + LEFT * spacing * i
-                    shift_animations.append(customer.animate.move_to(new_position))
-                
-                if shift_animations:
-                    self.play(*shift_animations)
-            else:
-                server_busy = False
-                next_departure_time = float('inf')
-
-        # Finalize cumulative queue time till the end of simulation
-        if current_time < simulation_time:
-            time_since_last_event = simulation_time - last_event_time
-            cumulative_queue_time += len(queue) * time_since_last_event
-
-        # Calculate average queue length
-        average_queue_length = cumulative_queue_time / simulation_time
-
-        # Calculate average waiting time
-        if waiting_times:
-            average_waiting_time = sum(waiting_times) / len(waiting_times)
-        else:
-            average_waiting_time = 0.0
+        statistics = trace.statistics()
+        customer_count = statistics['customer_count']
+        average_queue_length = statistics['average_queue_length']
+        average_waiting_time = statistics['average_waiting_time']
 
         # Display statistics
         stats = VGroup(
@@ -1,128 +1,131 @@
 from manim import *
 import numpy as np
-import heapq
 
-class MMcQueueSimulation(Scene):
-    def construct(self):
-        # Parameters
-        arrival_rate = 3.1  # λ: Arrival rate
-        service_rate = 1  # μ: Service rate
-        num_servers = 3     # c: Number of servers
-        max_time = 10       # Total simulation time
+from queue_engine import ARRIVAL, DEPARTURE, SERVICE_START, MMcSimulation
+from queue_visuals import CustomerPool, FramePlayback, QueueLine
+
+class MMcQueueSimulation(FramePlayback, Scene):
+    # Parameters
+    arrival_rate = 3.1  # λ: Arrival rate
+    service_rate = 1  # μ: Service rate
+    num_servers = 3     # c: Number of servers
+    max_time = 10       # Total simulation time
+    seed = None
+    # time_compression and batch_frames (see FramePlayback) pick frame-by-frame playback
 
+    def construct(self):
         # Define server positions (aligned horizontally at the top)
-        server_x_positions = np.linspace(-5, 5, num_servers)
+        server_x_positions = np.linspace(-5, 5, self.num_servers)
         server_y_position = 3  # Near the top of the scene
         server_positions = [np.array([x, server_y_position, 0]) for x in server_x_positions]
-        
-        servers = []
-        for i in range(num_servers):
+
+        self.servers = []
+        for i in range(self.num_servers):
             server = Square(color=BLUE, fill_opacity=0.5).scale(0.5).move_to(server_positions[i])
             server_label = Text(f"Server {i+1}", font_size=20).next_to(server, UP)
             self.play(Create(server), Write(server_label))
-            servers.append({'server': server, 'label': server_label, 'busy': False, 'customer': None})
-        
+            self.servers.append({'server': server, 'label': server_label})
+
         self.wait(1)
-        
+
         # Queue positions (aligned horizontally at the bottom)
         max_queue_length = 20  # Maximum queue length for positioning
         queue_x_positions = np.linspace(-5, 5, max_queue_length)
         queue_y_position = -3  # Near the bottom of the scene
-        queue_positions = [np.array([x, queue_y_position, 0]) for x in queue_x_positions]
-        queue = []
 
-        # Event list (priority queue)
-        events = []
+        # The last position holds a "+N" counter for customers that don't fit
+        self.queue_line = QueueLine(
+            head=np.array([queue_x_positions[0], queue_y_position, 0]),
+            step=RIGHT * (queue_x_positions[1] - queue_x_positions[0]),
+            max_visible=max_queue_length - 1,
+        )
 
-        # Schedule first arrival
-        arrival_time = np.random.exponential(1 / arrival_rate)
-        heapq.heappush(events, (arrival_time, 'arrival', {'customer_id': 1}))
+        # Dictionary to store customer objects
+        self.customer_objects = {}
+        # Departed customers are recycled for later arrivals
+        self.customer_pool = CustomerPool(color=GREEN, fill_opacity=0.5, label_format="C{}", font_size=16)
 
-        # Customer count
-        customer_count = 1
+        self.play_simulation(self.simulate())
 
-        # Current simulation time
-        current_time = 0
+        # Wait at the end
+        self.wait(2)
 
-        # Dictionary to store customer objects
-        customer_objects = {}
+    def simulate(self):
+        """(time, event, customer_id, server_index) in time order, from the engine's event log.
 
-        while events and current_time < max_time:
-            event_time, event_type, event_data = heapq.heappop(events)
+        Events are ARRIVAL (server_index is -1 when the customer has to
+        queue), SERVICE_START and DEPARTURE. The run pauses at max_time, so
+        customers still in the system then stay on screen.
+        """
+        simulation = MMcSimulation(self.arrival_rate, self.service_rate, self.num_servers, self.seed,
+                                   record_events=True, keep_customers=False)
+        events = simulation.run(self.max_time, drain=False).events
+        return zip(events['time'].tolist(), events['event'].tolist(),
+                   events['customer'].tolist(), events['server'].tolist())
+
+    def play_events(self, events):
+        current_time = 0
+        for event_time, event_type, customer_id, server_index in events:
             time_to_wait = event_time - current_time
             if time_to_wait > 0:
                 self.wait(time_to_wait)
                 current_time = event_time
 
-            if event_type == 'arrival':
-                customer_id = event_data['customer_id']
-                # Create customer object
-                customer = Circle(color=GREEN, fill_opacity=0.5).scale(0.3)
-                customer_label = Text(f"C{customer_id}", font_size=16).move_to(customer.get_center())
-                customer_group = VGroup(customer, customer_label)
+            if event_type == ARRIVAL:
                 # Customer enters from the bottom
+                customer_group = self.customer_pool.acquire(customer_id)
                 customer_group.move_to(np.array([0, -4, 0]))  # Start from just below the scene
-                customer_objects[customer_id] = customer_group
+                self.customer_objects[customer_id] = customer_group
 
-                # Animate arrival
+                # Animate arrival; customers who find a free server go to it on SERVICE_START
                 self.play(FadeIn(customer_group, shift=UP), run_time=0.5)
-
-                # Check for available server
-                server_found = False
-                for server_info in servers:
-                    if not server_info['busy']:
-                        server_found = True
-                        server_info['busy'] = True
-                        server_info['customer'] = customer_id
-                        # Move customer to server
-                        self.play(customer_group.animate.move_to(server_info['server'].get_center()), run_time=0.5)
-                        # Schedule departure
-                        service_time = np.random.exponential(1 / service_rate)
-                        departure_time = current_time + service_time
-                        server_index = servers.index(server_info)
-                        heapq.heappush(events, (departure_time, 'departure', {'customer_id': customer_id, 'server_index': server_index}))
-                        break
-                if not server_found:
+                if server_index < 0:
                     # No available server, add to queue
-                    queue.append(customer_id)
-                    queue_position = queue_positions[len(queue) - 1]
-                    self.play(customer_group.animate.move_to(queue_position), run_time=0.5)
-
-                # Schedule next arrival
-                customer_count += 1
-                next_arrival_time = current_time + np.random.exponential(1 / arrival_rate)
-                if next_arrival_time < max_time:
-                    heapq.heappush(events, (next_arrival_time, 'arrival', {'customer_id': customer_count}))
-
-            elif event_type == 'departure':
-                customer_id = event_data['customer_id']
-                server_index = event_data['server_index']
-                server_info = servers[server_index]
-                customer_group = customer_objects[customer_id]
+                    self.play(*self.queue_line.join(customer_group), run_time=0.5)
+
+            elif event_type == DEPARTURE:
+                customer_group = self.customer_objects.pop(customer_id)
                 # Animate departure
                 self.play(FadeOut(customer_group), run_time=0.5)
-                server_info['busy'] = False
-                server_info['customer'] = None
-                # Check if queue is not empty
-                if queue:
-                    next_customer_id = queue.pop(0)
-                    next_customer_group = customer_objects[next_customer_id]
-                    # Move next customer to server
-                    self.play(next_customer_group.animate.move_to(server_info['server'].get_center()), run_time=0.5)
-                    # Shift remaining queue positions
-                    for idx, cid in enumerate(queue):
-                        pos = queue_positions[idx]
-                        cust_group = customer_objects[cid]
-                        self.play(cust_group.animate.move_to(pos), run_time=0.2)
-                    # Update server info
-                    server_info['busy'] = True
-                    server_info['customer'] = next_customer_id
-                    # Schedule departure for next customer
-                    service_time = np.random.exponential(1 / service_rate)
-                    departure_time = current_time + service_time
-                    heapq.heappush(events, (departure_time, 'departure', {'customer_id': next_customer_id, 'server_index': server_index}))
-            else:
-                pass  # Unknown event type
+                self.customer_pool.release(customer_group)
 
-        # Wait at the end
-        self.wait(2)
+            elif event_type == SERVICE_START:
+                customer_group = self.customer_objects[customer_id]
+                shift_animations = []
+                if customer_group in self.queue_line:
+                    # FIFO: the customer entering service is the front of the line
+                    customer_group, shift_animations = self.queue_line.leave()
+                # Move the customer to the server and shift the remaining queue as one group
+                self.play(
+                    customer_group.animate.move_to(self.servers[server_index]['server'].get_center()),
+                    *shift_animations,
+                    run_time=0.5,
+                )
+
+    def play_coalesced(self, events):
+        in_service = {}  # server_index -> customer
+
+        def apply_event(event):
+            _, event_type, customer_id, server_index = event
+            if event_type == ARRIVAL:
+                customer_group = self.customer_pool.acquire(customer_id)
+                self.customer_objects[customer_id] = customer_group
+                if server_index < 0:
+                    self.queue_line.enqueue(customer_group)
+            elif event_type == DEPARTURE:
+                del in_service[server_index]
+                return self.customer_pool, self.customer_objects.pop(customer_id)
+            elif event_type == SERVICE_START:
+                customer_group = self.customer_objects[customer_id]
+                if customer_group in self.queue_line:
+                    customer_group = self.queue_line.dequeue()
+                in_service[server_index] = customer_group
+            return None
+
+        def service_positions():
+            return {
+                customer_group: self.servers[server_index]['server'].get_center()
+                for server_index, customer_group in in_service.items()
+            }
+
+        self.play_frames(events, apply_event, service_positions, [self.queue_line])
@@ -1,139 +1,126 @@
 from manim import *
 import numpy as np
 
-class MultipleMM1Queues(Scene):
+from multi_queue import merged_events, simulate_independent_mm1
+from queue_engine import ARRIVAL, DEPARTURE, SERVICE_START
+from queue_visuals import CustomerPool, FramePlayback, QueueLine
+
+class MultipleMM1Queues(FramePlayback, Scene):
+    # Define parameters for each queue
+    queues = [
+        {'name': 'Queue 1', 'arrival_rate': 0.5, 'service_rate': 1.0, 'color': BLUE},
+        {'name': 'Queue 2', 'arrival_rate': 0.7, 'service_rate': 1.0, 'color': GREEN},
+        {'name': 'Queue 3', 'arrival_rate': 0.6, 'service_rate': 1.0, 'color': RED},
+    ]
+    max_time = 10  # Maximum simulation time
+    seed = None
+    # time_compression and batch_frames (see FramePlayback) pick frame-by-frame playback
+
     def construct(self):
-        # Define parameters for each queue
-        queues = [
-            {'name': 'Queue 1', 'arrival_rate': 0.5, 'service_rate': 1.0, 'color': BLUE},
-            {'name': 'Queue 2', 'arrival_rate': 0.7, 'service_rate': 1.0, 'color': GREEN},
-            {'name': 'Queue 3', 'arrival_rate': 0.6, 'service_rate': 1.0, 'color': RED},
-        ]
-        
-        # Positions for the queues
-        server_positions = [
-            LEFT * 4,
-            ORIGIN,
-            RIGHT * 4,
-        ]
-        
+        queues = self.queues
+
+        # Positions for the queues, spread evenly across the frame
+        self.server_positions = [RIGHT * x for x in np.linspace(-4, 4, len(queues))]
+
         # Create servers and labels
-        servers = []
+        self.servers = []
         for i, queue in enumerate(queues):
-            server = Square(color=queue['color'], fill_opacity=0.5).scale(0.5).move_to(server_positions[i] + UP * 1)
+            server = Square(color=queue['color'], fill_opacity=0.5).scale(0.5).move_to(self.server_positions[i] + UP * 1)
             server_label = Text(queue['name'], font_size=24).next_to(server, UP)
             self.play(Create(server), Write(server_label))
-            servers.append({'server': server, 'label': server_label, 'queue': [], 'positions': []})
-        
+            self.servers.append({'server': server, 'label': server_label})
+
         self.wait(1)
-        
-        # Maximum simulation time
-        max_time = 10
-        
-        # Simulate each queue
-        for idx, queue_info in enumerate(queues):
-            arrival_rate = queue_info['arrival_rate']
-            service_rate = queue_info['service_rate']
-            server_pos = servers[idx]['server'].get_center()
-            
-            # Generate arrival times
-            arrival_times = []
-            t = np.random.exponential(1 / arrival_rate)
-            while t < max_time:
-                arrival_times.append(t)
-                t += np.random.exponential(1 / arrival_rate)
-            
-            # Generate service times
-            service_times = [np.random.exponential(1 / service_rate) for _ in arrival_times]
-            
-            # Schedule events
-            events = []
-            for i in range(len(arrival_times)):
-                arrival_time = arrival_times[i]
-                service_time = service_times[i]
-                events.append({'time': arrival_time, 'type': 'arrival', 'index': i})
-                events.append({'time': arrival_time + service_time, 'type': 'departure', 'index': i})
-            
-            # Sort events by time
-            events.sort(key=lambda x: x['time'])
-            
-            # Store in server info
-            servers[idx]['arrival_times'] = arrival_times
-            servers[idx]['service_times'] = service_times
-            servers[idx]['events'] = events
-            servers[idx]['current_time'] = 0
-            servers[idx]['customer_objects'] = {}
-            servers[idx]['queue_positions'] = [server_pos + RIGHT * i * 0.8 for i in range(1, 6)]
-        
-        # Now, we need to simulate all events in chronological order across all queues
-        # Combine all events from all queues and sort them
-        all_events = []
-        for idx, server in enumerate(servers):
-            for event in server['events']:
-                all_events.append({'queue_idx': idx, **event})
-        
-        all_events.sort(key=lambda x: x['time'])
-        
-        # Simulate the events
-        for event in all_events:
-            queue_idx = event['queue_idx']
-            server = servers[queue_idx]
-            queue_name = queues[queue_idx]['name']
-            color = queues[queue_idx]['color']
-            event_time = event['time']
-            time_to_wait = event_time - server['current_time']
-            
+
+        max_time = self.max_time
+
+        # Simulate every queue at once; FIFO departures come from the Lindley recursion
+        result = simulate_independent_mm1(
+            [queue['arrival_rate'] for queue in queues],
+            [queue['service_rate'] for queue in queues],
+            max_time,
+            self.seed,
+        )
+
+        # A waiting line fills the gap up to the next server: slots 0.8 apart,
+        # the last one ending at the next server's edge (0.8 from its centre).
+        # Four slots at most, so the last station's line stays in the frame.
+        spacing = min(self.server_positions[1][0] - self.server_positions[0][0], 4) if len(queues) > 1 else 4
+        slot_step = 0.8
+        max_visible = max(1, int((spacing - 0.8) / slot_step + 1e-9))
+
+        for idx, server in enumerate(self.servers):
+            server_pos = server['server'].get_center()
+            server['customer_objects'] = {}
+            # Departed customers are recycled for later arrivals at the same queue
+            server['customer_pool'] = CustomerPool(
+                color=queues[idx]['color'], fill_opacity=0.5, label_format="C{}", font_size=16
+            )
+            # Longer queues show a "+N" counter under the last slot, so it
+            # stays clear of the neighbour
+            server['queue_line'] = QueueLine(
+                head=server_pos + RIGHT * slot_step, step=RIGHT * slot_step, max_visible=max_visible,
+                counter_position=server_pos + RIGHT * slot_step * max_visible + DOWN * 0.7, font_size=16
+            )
+
+        # Play the stations' event streams merged lazily in time order, on one clock
+        self.play_simulation(merged_events(result))
+
+        # Wait at the end
+        self.wait(2)
+
+    def play_events(self, events):
+        current_time = 0
+        for event_time, queue_idx, customer_idx, event_type in events:
+            server = self.servers[queue_idx]
+            time_to_wait = event_time - current_time
+
             if time_to_wait > 0:
                 self.wait(time_to_wait)
-                server['current_time'] = event_time
-            
-            if event['type'] == 'arrival':
+                current_time = event_time
+
+            if event_type == ARRIVAL:
                 # Create a customer
-                customer_idx = event['index']
-                customer = Circle(color=color, fill_opacity=0.5).scale(0.3)
-                customer_label = Text(f"C{customer_idx+1}", font_size=16).move_to(customer.get_center())
-                customer_group = VGroup(customer, customer_label)
-                customer_group.move_to(server_positions[queue_idx] + DOWN * 3)
-                
+                customer_group = server['customer_pool'].acquire(customer_idx + 1)
+                customer_group.move_to(self.server_positions[queue_idx] + DOWN * 3)
+
                 # Animate arrival
                 self.play(FadeIn(customer_group, shift=UP), run_time=0.5)
-                
+
                 # Move to queue position
-                queue_length = len(server['queue'])
-                if queue_length < len(server['queue_positions']):
-                    queue_pos = server['queue_positions'][queue_length]
-                else:
-                    # Extend queue positions if needed
-                    new_pos = server['queue_positions'][-1] + RIGHT * 0.8
-                    server['queue_positions'].append(new_pos)
-                    queue_pos = new_pos
-                
-                self.play(customer_group.animate.move_to(queue_pos), run_time=0.5)
-                server['queue'].append(customer_group)
+                self.play(*server['queue_line'].join(customer_group), run_time=0.5)
                 server['customer_objects'][customer_idx] = customer_group
-            elif event['type'] == 'departure':
-                customer_idx = event['index']
-                customer_group = server['customer_objects'].get(customer_idx)
-                if customer_group is None:
-                    continue  # Should not happen
-                
-                # If customer is at the front of the queue, move to server
-                if server['queue'][0] == customer_group:
-                    self.play(customer_group.animate.move_to(server['server'].get_center()), run_time=0.5)
-                    # Simulate service time (already accounted for in timing)
-                    # Remove customer from queue
-                    server['queue'].pop(0)
-                    # Depart
-                    self.play(FadeOut(customer_group), run_time=0.5)
-                    # Move the rest of the queue forward
-                    for i, following_customer in enumerate(server['queue']):
-                        new_pos = server['queue_positions'][i]
-                        self.play(following_customer.animate.move_to(new_pos), run_time=0.2)
-                else:
-                    # Customer is not at front; departure should not happen yet
-                    pass  # In M/M/1, customers depart in order
-            else:
-                pass  # Unknown event type
-        
-        # Wait at the end
-        self.wait(2)
+            elif event_type == SERVICE_START:
+                # The front of the line moves into the server and the rest shift forward
+                customer_group, shift_animations = server['queue_line'].leave()
+                self.play(customer_group.animate.move_to(server['server'].get_center()),
+                          *shift_animations, run_time=0.5)
+            elif event_type == DEPARTURE:
+                customer_group = server['customer_objects'].pop(customer_idx)
+                self.play(FadeOut(customer_group), run_time=0.5)
+                server['customer_pool'].release(customer_group)
+
+    def play_coalesced(self, events):
+        in_service = {}  # queue_idx -> customer
+
+        def apply_event(event):
+            _, queue_idx, customer_idx, event_type = event
+            server = self.servers[queue_idx]
+            if event_type == ARRIVAL:
+                customer_group = server['customer_pool'].acquire(customer_idx + 1)
+                server['customer_objects'][customer_idx] = customer_group
+                server['queue_line'].enqueue(customer_group)
+            elif event_type == SERVICE_START:
+                in_service[queue_idx] = server['queue_line'].dequeue()
+            elif event_type == DEPARTURE:
+                del in_service[queue_idx]
+                return server['customer_pool'], server['customer_objects'].pop(customer_idx)
+            return None
+
+        def service_positions():
+            return {
+                customer_group: self.servers[queue_idx]['server'].get_center()
+                for queue_idx, customer_group in in_service.items()
+            }
+
+        self.play_frames(events, apply_event, service_positions, [server['queue_line'] for server in self.servers])
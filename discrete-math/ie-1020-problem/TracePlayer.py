@@ -0,0 +1,18 @@
+import os
+
+from event_trace import load_trace
+from MMcQueue import MMCQueueScene
+
+# Renders a previously dumped event trace instead of re-running the model,
+# so layout and colour changes never touch the random numbers.
+#
+#   QUEUE_TRACE_OUT=mmc_trace manim -ql MMcQueue.py MMCQueueScene
+#   QUEUE_TRACE=mmc_trace manim -qh TracePlayer.py TracePlayerScene
+
+
+class TracePlayerScene(MMCQueueScene):
+    # Trace to play back (.npz file or directory written by save_trace)
+    trace_path = os.environ.get("QUEUE_TRACE", "mmc_trace")
+
+    def get_trace(self):
+        return load_trace(self.trace_path)
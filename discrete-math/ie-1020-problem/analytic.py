@@ -0,0 +1,190 @@
+import math
+
+import numpy as np
+
+# Closed-form steady-state metrics for M/M/1, M/M/c and M/M/c/K queues.
+#
+# Every function accepts scalars or NumPy arrays for the rates, the number
+# of servers and the capacity, broadcasts them against each other and
+# evaluates the whole grid at once. Loops only run over the number of
+# servers (or capacity), never over grid points, so a 10^6-point grid is a
+# few dozen array operations. Unstable points (rho >= 1 without a capacity
+# limit) come back as inf.
+#
+# Notation: a = λ/μ is the offered load, rho = λ/(cμ) the utilization,
+# Lq/Wq the mean number/time in queue, L/W the same in the system.
+
+
+def _broadcast(*values):
+    arrays = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in values])
+    return [np.array(a) for a in arrays]
+
+
+def _unwrap(metrics):
+    # Return plain floats when every input was a scalar
+    if all(np.ndim(v) == 0 for v in metrics.values()):
+        return {key: float(value) for key, value in metrics.items()}
+    return metrics
+
+
+def erlang_b(arrival_rate, service_rate, c):
+    """Blocking probability of M/M/c/c, by the stable Erlang B recursion."""
+    arrival_rate, service_rate, c = _broadcast(arrival_rate, service_rate, c)
+    a = arrival_rate / service_rate
+    blocking = np.ones_like(a)
+    for k in range(1, int(c.max(initial=0)) + 1):
+        updated = a * blocking / (k + a * blocking)
+        blocking = np.where(k <= c, updated, blocking)
+    return blocking
+
+
+def erlang_c(arrival_rate, service_rate, c):
+    """Probability an arriving customer has to wait in M/M/c (1 when unstable)."""
+    arrival_rate, service_rate, c = _broadcast(arrival_rate, service_rate, c)
+    a = arrival_rate / service_rate
+    blocking = erlang_b(arrival_rate, service_rate, c)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_wait = c * blocking / (c - a * (1 - blocking))
+    return np.where(a < c, p_wait, 1.0)
+
+
+def mmc_metrics(arrival_rate, service_rate, c=1, target_time=0.0):
+    """Steady-state M/M/c metrics.
+
+    service_level is P(Wq <= target_time), the fraction of customers
+    answered within the target.
+    """
+    arrival_rate, service_rate, c, target_time = _broadcast(arrival_rate, service_rate, c, target_time)
+    a = arrival_rate / service_rate
+    rho = a / c
+    stable = rho < 1
+    p_wait = erlang_c(arrival_rate, service_rate, c)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drain_rate = c * service_rate - arrival_rate
+        wq = np.where(stable, p_wait / drain_rate, np.inf)
+        service_level = np.where(stable, 1 - p_wait * np.exp(-drain_rate * target_time), 0.0)
+    lq = arrival_rate * wq
+    w = wq + 1 / service_rate
+
+    return _unwrap({
+        'rho': rho,
+        'p_wait': p_wait,
+        'Lq': lq,
+        'Wq': wq,
+        'L': lq + a,
+        'W': w,
+        'service_level': service_level,
+    })
+
+
+def mm1_metrics(arrival_rate, service_rate, target_time=0.0):
+    return mmc_metrics(arrival_rate, service_rate, 1, target_time)
+
+
+def mmck_metrics(arrival_rate, service_rate, c, capacity, target_time=0.0):
+    """Steady-state M/M/c/K metrics, K = capacity (customers in service + queue).
+
+    Arrivals finding K customers are lost; waiting-time metrics refer to
+    admitted customers. Always stable.
+    """
+    arrival_rate, service_rate, c, capacity, target_time = _broadcast(
+        arrival_rate, service_rate, c, capacity, target_time
+    )
+    a = arrival_rate / service_rate
+    log_a = np.log(a)
+    max_capacity = int(capacity.max(initial=0))
+
+    # Unnormalised log-probabilities follow log p[n] = log p[n-1] + log a - log min(n, c).
+    # First pass: normaliser, accumulated with a running maximum for stability
+    log_c = np.log(c)
+    log_p = np.zeros_like(a)
+    peak = np.zeros_like(a)
+    total = np.ones_like(a)
+    for n in range(1, max_capacity + 1):
+        log_p = log_p + log_a - np.minimum(math.log(n), log_c)
+        active = n <= capacity
+        # One exponential per state: rescale the total when log_p sets a new peak
+        above = active & (log_p > peak)
+        scale = np.exp(-np.abs(log_p - peak))
+        total = np.where(above, total * scale + 1, np.where(active, total + scale, total))
+        peak = np.where(above, log_p, peak)
+    log_norm = peak + np.log(total)
+
+    # Second pass: moments, the probability of a full system and the
+    # waiting-time tail. An admitted arrival that finds n >= c customers
+    # waits for n - c + 1 service completions at rate cμ; it waits longer
+    # than t when at most n - c completions happen in t (a Poisson tail).
+    # The Poisson term and its running CDF at j = n - c are carried along
+    # as n grows.
+    drain = c * service_rate * target_time
+    first_term = np.exp(-drain)
+    log_p = np.zeros_like(a)
+    p = np.exp(log_p - log_norm)
+    mean_in_system = np.zeros_like(a)
+    mean_in_queue = np.zeros_like(a)
+    p_full = np.where(capacity == 0, p, 0.0)
+    waiting_mass = np.zeros_like(a)
+    late_mass = np.zeros_like(a)
+    term = np.zeros_like(a)
+    poisson_cdf = np.zeros_like(a)
+    for n in range(1, max_capacity + 1):
+        log_p = log_p + log_a - np.minimum(math.log(n), log_c)
+        p = np.exp(log_p - log_norm) * (n <= capacity)
+        mean_in_system += n * p
+        mean_in_queue += np.maximum(n - c, 0) * p
+        p_full = np.where(n == capacity, p, p_full)
+
+        term = np.where(n == c, first_term, term * drain / np.maximum(n - c, 1))
+        poisson_cdf = np.where(n >= c, poisson_cdf + term, 0.0)
+        waiting = p * ((n >= c) & (n < capacity))
+        waiting_mass += waiting
+        late_mass += waiting * poisson_cdf
+
+    admitted = 1 - p_full
+    effective_rate = arrival_rate * admitted
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wq = mean_in_queue / effective_rate
+        w = mean_in_system / effective_rate
+        p_wait = waiting_mass / admitted
+        service_level = 1 - late_mass / admitted
+
+    return _unwrap({
+        'rho': effective_rate / (c * service_rate),
+        'p_block': p_full,
+        'throughput': effective_rate,
+        'p_wait': p_wait,
+        'Lq': mean_in_queue,
+        'Wq': wq,
+        'L': mean_in_system,
+        'W': w,
+        'service_level': service_level,
+    })
+
+
+def required_servers(arrival_rate, service_rate, target_time, service_level, max_servers=10_000):
+    """Smallest c with P(Wq <= target_time) >= service_level, elementwise.
+
+    Starts from the stability bound floor(a) + 1 and walks upwards only for
+    the grid points that still miss the target.
+    """
+    arrival_rate, service_rate, target_time, service_level = _broadcast(
+        arrival_rate, service_rate, target_time, service_level
+    )
+    shape = arrival_rate.shape
+    arrival_rate, service_rate, target_time, service_level = (
+        v.ravel() for v in (arrival_rate, service_rate, target_time, service_level)
+    )
+    c = np.floor(arrival_rate / service_rate) + 1
+    pending = np.ones(c.shape, dtype=bool)
+    while pending.any():
+        achieved = mmc_metrics(arrival_rate[pending], service_rate[pending], c[pending],
+                               target_time[pending])['service_level']
+        missed = np.flatnonzero(pending)[np.asarray(achieved) < service_level[pending]]
+        pending[:] = False
+        pending[missed] = True
+        c[missed] += 1
+        if (c[missed] > max_servers).any():
+            raise ValueError(f"service level not reachable with {max_servers} servers")
+    c = c.astype(np.int64).reshape(shape)
+    return c if c.ndim else int(c)
@@ -0,0 +1,182 @@
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from multi_queue import simulate_independent_mm1
+from queue_engine import ENGINE_VERSION, MMcSimulation, simulate_mm1_vectorized
+
+# Benchmark suite for the queue simulators.
+#
+# Each case runs one model on a fixed number of customers and reports
+# events/sec (one arrival and one departure per customer, whatever the
+# model), wall time and peak resident memory. Cases run one at a time in a
+# freshly spawned process, so the peak RSS belongs to that case alone and
+# one case's garbage never slows the next. Each timing sample repeats the
+# case until it covers at least SAMPLE_TIME seconds, and the median of
+# SAMPLES samples counts: single millisecond runs swing by a quarter
+# between runs, and a lucky best time in the baseline would trip the
+# regression check later.
+#
+#   python benchmark.py                       # full suite, printed as a table
+#   python benchmark.py --quick --save baseline.json
+#   python benchmark.py --quick --compare baseline.json --tolerance 0.2
+#
+# --compare exits with status 1 when any case lost more than `tolerance`
+# of its baseline events/sec, so the suite can guard against regressions.
+#
+# With the heap-based event calendar and free-server index, events/sec of
+# the event loop should stay roughly flat from a handful of servers to
+# call-centre sizes; the vectorized M/M/1 path should be far ahead of it.
+
+MODELS = ('mm1_event_loop', 'mm1_vectorized', 'mmc_event_loop', 'multi_queue')
+SAMPLES = 5
+SAMPLE_TIME = 0.1  # Seconds
+
+
+def suite(quick=False):
+    """(model, params) cases sweeping ρ, horizon, c and the number of stations."""
+    scale = 10 if quick else 1
+    cases = []
+    for model in ('mm1_event_loop', 'mm1_vectorized'):
+        for rho in (0.5, 0.9):
+            for customers in (100_000, 1_000_000):
+                cases.append((model, {'rho': rho, 'c': 1, 'customers': customers // scale}))
+    for c in (1, 10, 100, 1000):
+        cases.append(('mmc_event_loop', {'rho': 0.9, 'c': c, 'customers': 200_000 // scale}))
+    for stations in (10, 100, 1000):
+        cases.append(('multi_queue', {'rho': 0.9, 'stations': stations, 'customers': 1_000_000 // scale}))
+    return cases
+
+
+def _simulate(model, params, service_rate=1.0, seed=42):
+    # Returns the number of customers simulated
+    rho, customers = params['rho'], params['customers']
+    if model == 'multi_queue':
+        stations = params['stations']
+        arrival_rate = rho * service_rate
+        simulation_time = customers / (stations * arrival_rate)
+        result = simulate_independent_mm1(np.full(stations, arrival_rate), service_rate, simulation_time, seed)
+        return int(result.counts.sum())
+
+    c = params['c']
+    arrival_rate = rho * c * service_rate
+    simulation_time = customers / arrival_rate
+    if model == 'mm1_vectorized':
+        return simulate_mm1_vectorized(arrival_rate, service_rate, simulation_time, seed,
+                                       keep_customers=False).customer_count
+    return MMcSimulation(arrival_rate, service_rate, c, seed, keep_customers=False).run(simulation_time).customer_count
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(model, params, samples=SAMPLES, sample_time=SAMPLE_TIME):
+    # Calibrate how many runs make up one sample from a first, warm-up run
+    start = time.perf_counter()
+    customers = _simulate(model, params)
+    runs = max(1, math.ceil(sample_time / (time.perf_counter() - start)))
+
+    sample_times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(runs):
+            _simulate(model, params)
+        sample_times.append((time.perf_counter() - start) / runs)
+    wall_time = float(np.median(sample_times))
+    return {
+        'model': model,
+        'params': params,
+        'customers': customers,
+        'wall_time': wall_time,
+        'runs': runs,
+        # Every customer causes one arrival and one departure event
+        'events_per_second': 2 * customers / wall_time,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+
+def run_suite(cases, isolate=True):
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    for model, params in cases:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                rows.append(executor.submit(run_case, model, params).result())
+        else:
+            rows.append(run_case(model, params))
+    return rows
+
+
+def _case_key(row):
+    return row['model'], json.dumps(row['params'], sort_keys=True)
+
+
+def save_baseline(path, rows):
+    baseline = {
+        'engine_version': ENGINE_VERSION,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'rows': rows,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+
+
+def compare(rows, baseline, tolerance=0.2):
+    """Rows whose events/sec fell more than `tolerance` below the baseline's."""
+    reference = {_case_key(row): row for row in baseline['rows']}
+    regressions = []
+    for row in rows:
+        before = reference.get(_case_key(row))
+        if before is None:
+            continue
+        ratio = row['events_per_second'] / before['events_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append({**row, 'baseline_events_per_second': before['events_per_second'], 'ratio': ratio})
+    return regressions
+
+
+def print_table(rows):
+    print(f"{'model':<16} {'params':<38} {'customers':>10} {'wall (s)':>9} {'events/s':>12} {'peak MB':>8}")
+    for row in rows:
+        params = ' '.join(f"{key}={value}" for key, value in row['params'].items())
+        peak = f"{row['peak_rss_mb']:.0f}" if row['peak_rss_mb'] is not None else '-'
+        print(f"{row['model']:<16} {params:<38} {row['customers']:>10} {row['wall_time']:>9.2f} "
+              f"{row['events_per_second']:>12,.0f} {peak:>8}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the queue simulators.")
+    parser.add_argument('--quick', action='store_true', help="a tenth of the customers in every case")
+    parser.add_argument('--models', nargs='+', choices=MODELS, default=list(MODELS))
+    parser.add_argument('--save', help="write the results as a baseline JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to check the results against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed events/sec drop (fraction)")
+    args = parser.parse_args()
+
+    rows = run_suite([case for case in suite(args.quick) if case[0] in args.models])
+    print_table(rows)
+    if args.save:
+        save_baseline(args.save, rows)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(rows, json.load(f), args.tolerance)
+        for row in regressions:
+            print(f"regression: {row['model']} {row['params']}: {row['events_per_second']:,.0f} events/s, "
+                  f"{row['ratio']:.0%} of baseline {row['baseline_events_per_second']:,.0f}")
+        sys.exit(1 if regressions else 0)
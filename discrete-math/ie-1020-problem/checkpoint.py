@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from queue_engine import MMcSimulation
+
+# Checkpoints of long MMcSimulation runs.
+#
+# MMcSimulation.snapshot() returns the run state as plain data: the
+# calendar, waiting line and servers, the random streams (bit-generator
+# state plus the unused part of each variate block) and the streaming
+# statistics. save_checkpoint writes it to one .npz file, with the NumPy
+# arrays as members and everything else as a JSON string, like
+# event_trace.save_trace. A run paused with run(T, drain=False) can thus
+# be stopped, saved and later restored to continue to 2T, giving exactly
+# the run that would have gone to 2T in one go without redoing [0, T].
+#
+#   simulation = MMcSimulation(2, 1.5, 4, seed=42, keep_customers=False)
+#   simulation.run(10_000, drain=False)
+#   save_checkpoint('run.npz', simulation)
+#   ...
+#   simulation = load_checkpoint('run.npz', MMcSimulation(2, 1.5, 4, keep_customers=False))
+#   result = simulation.run(20_000)
+
+
+def _split(value, arrays):
+    # Move NumPy arrays out of a nested snapshot, leaving {'__array__': name}
+    if isinstance(value, np.ndarray):
+        name = f'array_{len(arrays)}'
+        arrays[name] = value
+        return {'__array__': name}
+    if isinstance(value, dict):
+        return {key: _split(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_split(item, arrays) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _join(value, archive):
+    if isinstance(value, dict):
+        if set(value) == {'__array__'}:
+            return archive[value['__array__']]
+        return {key: _join(item, archive) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_join(item, archive) for item in value]
+    return value
+
+
+def save_checkpoint(path, simulation, compressed=True):
+    """Write simulation.snapshot() to the .npz file `path`."""
+    arrays = {}
+    state = _split(simulation.snapshot(), arrays)
+    savez = np.savez_compressed if compressed else np.savez
+    # Write next to the target and rename, so a crash never leaves half a checkpoint
+    temporary = f'{path}.tmp.npz'
+    savez(temporary, state=np.array(json.dumps(state)), **arrays)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path, simulation):
+    """Restore a checkpoint into `simulation`, built with the arguments of the saved run."""
+    with np.load(path) as archive:
+        state = _join(json.loads(str(archive['state'])), archive)
+    return simulation.restore(state)
+
+
+if __name__ == '__main__':
+    arrival_rate, service_rate, c, horizon = 9.0, 1.0, 10, 50_000
+
+    def simulation():
+        return MMcSimulation(arrival_rate, service_rate, c, seed=42, keep_customers=False)
+
+    start = time.perf_counter()
+    reference = simulation().run(2 * horizon).statistics.summary()
+    print(f"one run to {2 * horizon}: {time.perf_counter() - start:.2f} s")
+
+    first = simulation()
+    first.run(horizon, drain=False)
+    save_checkpoint('checkpoint_demo.npz', first)
+    print(f"checkpoint at {horizon}: {os.path.getsize('checkpoint_demo.npz') / 1024:.0f} KiB")
+
+    start = time.perf_counter()
+    resumed = load_checkpoint('checkpoint_demo.npz', simulation()).run(2 * horizon).statistics.summary()
+    print(f"resumed from {horizon} to {2 * horizon}: {time.perf_counter() - start:.2f} s")
+    os.remove('checkpoint_demo.npz')
+
+    for metric in ('customers', 'waiting_time_mean', 'queue_length_time_average', 'waiting_time_p95'):
+        print(f"{metric}: {reference[metric]:.6g} (resumed {resumed[metric]:.6g})")
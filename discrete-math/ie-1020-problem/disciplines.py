@@ -0,0 +1,57 @@
+import heapq
+from collections import deque
+
+# Waiting-line disciplines for the c-server engine.
+#
+# The engine only appends customers to its waiting line and takes the next
+# one from the front, so every discipline is a line object with append,
+# popleft and len:
+#   - fifo:        first come, first served (a deque)
+#   - priority:    lowest class number first, FIFO within a class
+#   - preemptive:  as priority, and an arrival displaces a customer of a
+#                  lower class from service (preemptive resume)
+#   - sjf:         shortest service time first, non-preemptive
+#   - round_robin: FIFO, but service comes in slices of at most `quantum`
+#                  and unfinished customers rejoin the end of the line
+# The heap-backed lines insert and extract in O(log n), so the disciplines
+# stay comparable on million-customer runs.
+
+DISCIPLINES = ('fifo', 'priority', 'preemptive', 'sjf', 'round_robin')
+
+
+class HeapLine:
+    """Waiting line ordered by key(customer); ties go to the lower customer id."""
+
+    def __init__(self, key):
+        self.key = key
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def append(self, customer):
+        heapq.heappush(self.heap, (self.key(customer), customer))
+
+    def popleft(self):
+        return heapq.heappop(self.heap)[1]
+
+    def __iter__(self):
+        # Waiting customers in heap order; appending them again rebuilds the line
+        return (customer for _, customer in self.heap)
+
+
+def waiting_line(discipline, open_customers):
+    """An empty line for `discipline`.
+
+    open_customers maps customer ids to [arrival_time, service_start_time,
+    remaining_work, customer_class], as kept by MMcSimulation. Customer ids
+    grow with arrival time, so they double as the FIFO tie-break, and a
+    preempted customer resumes ahead of later arrivals of its class.
+    """
+    if discipline in ('fifo', 'round_robin'):
+        return deque()
+    if discipline in ('priority', 'preemptive'):
+        return HeapLine(lambda customer: open_customers[customer][3])
+    if discipline == 'sjf':
+        return HeapLine(lambda customer: open_customers[customer][2])
+    raise ValueError(f"unknown discipline {discipline!r}, expected one of {', '.join(DISCIPLINES)}")
@@ -0,0 +1,188 @@
+import json
+import os
+
+import numpy as np
+
+from queue_engine import ARRIVAL, DEPARTURE, PREEMPT, SERVICE_START, simulate_mmc
+from rates import PiecewiseConstant
+from variates import is_distribution
+
+# Columnar event traces: simulate once, render as often as needed.
+#
+# A trace is four parallel columns (time, event, customer, server) plus a
+# small metadata dict with the model parameters. It can be stored as one
+# .npz file or as a directory of .npy files; the directory form is opened
+# with memory mapping, so a trace with millions of events loads instantly
+# and is only paged in as playback reaches it.
+
+COLUMNS = {
+    'time': np.float64,
+    'event': np.int8,
+    'customer': np.int64,
+    'server': np.int32,
+}
+
+
+class EventTrace:
+    def __init__(self, columns, metadata=None):
+        self.columns = columns
+        self.metadata = metadata or {}
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def chunks(self, chunk_size=65536, start=0, stop=None):
+        """Yield (time, event, customer, server) lists one slice at a time.
+
+        Only chunk_size events are turned into Python objects at once, so
+        playback memory does not grow with the length of the trace. start
+        and stop restrict playback to a range of event indices.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            yield tuple(self.columns[name][chunk_start:chunk_stop].tolist() for name in COLUMNS)
+
+    def statistics(self):
+        """Scene statistics recomputed from the trace columns alone."""
+        times = np.asarray(self.columns['time'])
+        events = np.asarray(self.columns['event'])
+        customers = np.asarray(self.columns['customer'])
+        simulation_time = self.metadata['simulation_time']
+
+        arrivals = events == ARRIVAL
+        departures = events == DEPARTURE
+        customer_count = int(arrivals.sum())
+
+        # Customer ids are 1..n, so arrival and departure times can be
+        # scattered into per-customer arrays
+        arrival_times = np.empty(customer_count)
+        arrival_times[customers[arrivals] - 1] = times[arrivals]
+        departure_times = np.empty(customer_count)
+        departure_times[customers[departures] - 1] = times[departures]
+
+        # Each customer adds one to the queue on arrival (and on preemption) and
+        # removes one on service start (at the same instant when a server was free)
+        joins = (events == ARRIVAL) | (events == PREEMPT)
+        queue_length = np.cumsum(joins.astype(np.int64) - (events == SERVICE_START))
+        queue_time_integral = float(np.sum(queue_length[:-1] * np.diff(times))) if len(times) else 0.0
+
+        return {
+            'customer_count': customer_count,
+            'average_waiting_time': float(np.mean(departure_times - arrival_times)) if customer_count else 0.0,
+            'average_queue_length': queue_time_integral / simulation_time,
+        }
+
+
+def scene_states(trace, indices):
+    """Who is where just before each of the given event indices, in one pass.
+
+    Each snapshot lists the customers that arrived and are about to start
+    service directly ('arriving'), the waiting line in FIFO order ('queue')
+    and [server, customer] pairs in service ('in_service'), which is all a
+    scene needs to resume playback at that event.
+    """
+    indices = sorted(indices)
+    states = []
+    arriving, queue, serving = {}, {}, {}  # Dicts as insertion-ordered sets
+    index = 0
+    pending = iter(indices)
+    target = next(pending, None)
+
+    def snapshot():
+        return {
+            'arriving': list(arriving),
+            'queue': list(queue),
+            'in_service': sorted([server, customer] for customer, server in serving.items()),
+        }
+
+    for chunk in trace.chunks():
+        for _, event, customer, server in zip(*chunk):
+            while target == index:
+                states.append(snapshot())
+                target = next(pending, None)
+            if event == ARRIVAL:
+                (queue if server < 0 else arriving)[customer] = None
+            elif event == SERVICE_START:
+                (queue if customer in queue else arriving).pop(customer)
+                serving[customer] = server
+            elif event == DEPARTURE:
+                del serving[customer]
+            elif event == PREEMPT:
+                del serving[customer]
+                queue[customer] = None
+            index += 1
+    while target is not None:
+        states.append(snapshot())
+        target = next(pending, None)
+    return states
+
+
+class _NpzColumns(dict):
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+
+    def __missing__(self, name):
+        self[name] = self.archive[name]
+        return self[name]
+
+
+def record_trace(arrival_rate, service_rate, c, simulation_time, seed=None):
+    result = simulate_mmc(arrival_rate, service_rate, c, simulation_time, seed, record_events=True)
+    metadata = {
+        'arrival_rate': arrival_rate,
+        'service_rate': service_rate,
+        'c': c,
+        'simulation_time': simulation_time,
+        'seed': seed,
+    }
+    return EventTrace(result.events, metadata)
+
+
+def _metadata_json(value):
+    # json.dumps default for metadata values JSON can't take: λ(t) and c(t)
+    # profiles as (breakpoints, values) lists, NumPy values as Python ones and
+    # distributions by their repr, which labels them but can't rebuild them
+    if isinstance(value, PiecewiseConstant):
+        return value.to_profile()
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    if is_distribution(value):
+        return repr(value)
+    raise TypeError(f"trace metadata value {value!r} of type {type(value).__name__} is not JSON serializable")
+
+
+def save_trace(path, trace, compressed=False):
+    """Write a trace to `path`: a single .npz file, or a directory of .npy columns."""
+    columns = {name: np.asarray(trace[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+    metadata = json.dumps(trace.metadata, default=_metadata_json)
+    if str(path).endswith('.npz'):
+        savez = np.savez_compressed if compressed else np.savez
+        savez(path, metadata=np.array(metadata), **columns)
+        return
+
+    os.makedirs(path, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f'{name}.npy'), values)
+    with open(os.path.join(path, 'metadata.json'), 'w') as f:
+        f.write(metadata)
+
+
+def load_trace(path, mmap=True):
+    """Open a trace written by save_trace without reading every column into memory."""
+    if str(path).endswith('.npz'):
+        # .npz members can't be memory-mapped, but each column is only read
+        # the first time it is used
+        archive = np.load(path)
+        metadata = json.loads(str(archive['metadata']))
+        return EventTrace(_NpzColumns(archive), metadata)
+
+    mmap_mode = 'r' if mmap else None
+    columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in COLUMNS}
+    with open(os.path.join(path, 'metadata.json')) as f:
+        metadata = json.load(f)
+    return EventTrace(columns, metadata)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Size-bounded, content-addressed file store shared by sweep.ResultCache
+# and render_cache.RenderCache.
+#
+# Entries are files named by the hash of a canonical JSON description and
+# a suffix. Lookups mark a file as recently used by touching its mtime,
+# writes go through a temporary file and a rename so readers never see a
+# partial entry, and evict() deletes the least recently used files until
+# the directory fits in max_bytes. Subclasses only decide what goes into
+# the key and how an entry is read and written.
+
+
+def content_key(description):
+    """SHA-256 of the canonical JSON form of `description`."""
+    canonical = json.dumps(description, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class FileCache:
+    """Files in `directory`, named by key and suffix, at most max_bytes in total."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, f'{key}{suffix}')
+
+    def _lookup(self, key, suffix):
+        # Path of the entry, marked as recently used, or None
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    @contextmanager
+    def _writing(self, key, suffix, mode='wb'):
+        # Write to a temporary file first so readers never see half an entry
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, mode) as f:
+                yield f
+            os.replace(temporary, self._path(key, suffix))
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.remove(entry.path)
@@ -0,0 +1,233 @@
+import bisect
+import heapq
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from analytic import mmc_metrics
+from queue_engine import make_streams
+from streaming_stats import RunningMoments
+from variates import Categorical, Exponential, Uniform, VariateSource
+
+# Open queueing (Jackson) networks: M/M/c stations linked by routing.
+#
+# Customers arrive from outside at station i at rate external_rates[i].
+# After service at station i they move to station j with probability
+# routing[i, j] and leave the network with the remaining probability
+# 1 - sum_j routing[i, j]. With an all-zero routing matrix this is the
+# independent stations of multi_queue.py.
+#
+# jackson_metrics solves the traffic equations λ = γ + Rᵀλ with one linear
+# solve; by Jackson's theorem every station then behaves like an M/M/c
+# queue with arrival rate λ_i. simulate_network runs the same network as a
+# discrete-event simulation on one global event heap.
+
+EXTERNAL_ARRIVAL = 0
+COMPLETION = 1
+
+
+def traffic_rates(external_rates, routing):
+    """Total arrival rate λ of every station, from (I - Rᵀ) λ = γ."""
+    external_rates = np.asarray(external_rates, dtype=np.float64)
+    routing = np.asarray(routing, dtype=np.float64)
+    if (routing < 0).any() or (routing.sum(axis=1) > 1 + 1e-12).any():
+        raise ValueError("routing rows must be probabilities summing to at most 1")
+    # Customers leave with probability one only if R^n -> 0, i.e. its spectral
+    # radius is below 1. Otherwise I - Rᵀ is singular or nearly so, and a
+    # solve returns huge or negative rates instead of failing.
+    if len(routing) and np.abs(np.linalg.eigvals(routing)).max() >= 1 - 1e-9:
+        raise ValueError("routing matrix traps customers; every station needs a path out of the network")
+    return np.linalg.solve(np.eye(len(external_rates)) - routing.T, external_rates)
+
+
+def jackson_metrics(external_rates, routing, service_rates, c=1):
+    """Per-station M/M/c metrics plus network totals.
+
+    Returns {'arrival_rate': λ, station metrics as arrays (see
+    analytic.mmc_metrics), 'network': {throughput, L, W}}. W is the mean
+    time a customer spends in the network, by Little's law.
+    """
+    arrival_rates = traffic_rates(external_rates, routing)
+    service_rates = np.broadcast_to(np.asarray(service_rates, dtype=np.float64), arrival_rates.shape)
+    c = np.broadcast_to(np.asarray(c), arrival_rates.shape)
+
+    # Keep arrays even for a one-station network
+    stations = {key: np.atleast_1d(value) for key, value in mmc_metrics(arrival_rates, service_rates, c).items()}
+    throughput = float(np.sum(external_rates))
+    number_in_network = float(stations['L'].sum())
+    return {
+        'arrival_rate': arrival_rates,
+        **stations,
+        'network': {
+            'throughput': throughput,
+            'L': number_in_network,
+            'W': number_in_network / throughput if throughput else 0.0,
+        },
+    }
+
+
+@dataclass
+class NetworkResult:
+    simulation_time: float
+    customers: int  # External arrivals before the horizon
+    visits: np.ndarray  # Completed services per station
+    busy_time: np.ndarray  # Summed over each station's servers
+    number_time_integral: np.ndarray  # Integral of the number of customers at each station
+    queue_delay_total: np.ndarray
+    sojourn_total: np.ndarray  # Time in station per visit, summed
+    network_time: RunningMoments  # Time from entering to leaving the network
+    c: np.ndarray
+
+    @property
+    def throughput(self):
+        return self.visits / self.simulation_time
+
+    @property
+    def average_number(self):
+        return self.number_time_integral / self.simulation_time
+
+    @property
+    def average_queue_delay(self):
+        return np.divide(self.queue_delay_total, self.visits, out=np.zeros(len(self.visits)), where=self.visits > 0)
+
+    @property
+    def average_sojourn(self):
+        return np.divide(self.sojourn_total, self.visits, out=np.zeros(len(self.visits)), where=self.visits > 0)
+
+    @property
+    def utilization(self):
+        return self.busy_time / (self.c * self.simulation_time)
+
+
+def _routing_table(routing):
+    # Per station: cumulative probabilities and destinations of its non-zero
+    # routes, so a routing decision is one bisect over the few real options
+    table = []
+    for row in np.asarray(routing, dtype=np.float64):
+        destinations = np.flatnonzero(row)
+        table.append((np.cumsum(row[destinations]).tolist(), destinations.tolist()))
+    return table
+
+
+def simulate_network(external_rates, routing, service_rates, c=1, simulation_time=100, seed=None):
+    """Simulate a Jackson network of FIFO M/M/c stations.
+
+    External arrivals are accepted before the horizon; customers inside
+    then finish their route. Time averages divide by the horizon, as in
+    queue_engine.
+    """
+    external_rates = np.asarray(external_rates, dtype=np.float64)
+    stations = len(external_rates)
+    service_rates = np.broadcast_to(np.asarray(service_rates, dtype=np.float64), (stations,)).tolist()
+    c = np.broadcast_to(np.asarray(c, dtype=np.int64), (stations,))
+    traffic_rates(external_rates, routing)  # Validates the routing matrix
+    routes = _routing_table(routing)
+
+    arrival_rng, service_rng, routing_rng, entry_rng = make_streams(seed, count=4)
+    # The external arrivals form one Poisson stream of the total rate; each
+    # arrival then picks its entry station
+    total_rate = float(external_rates.sum())
+    inter_arrival_times = VariateSource(arrival_rng, Exponential(total_rate)) if total_rate > 0 else None
+    entry_stations = VariateSource(entry_rng, Categorical(external_rates)) if total_rate > 0 else None
+    service_times = VariateSource(service_rng, Exponential(1.0))
+    uniforms = VariateSource(routing_rng, Uniform())
+
+    # Station state
+    queues = [deque() for _ in range(stations)]  # (customer, time joined the station)
+    free_servers = c.tolist()
+    number = [0] * stations
+    last_change = [0.0] * stations
+    visits = [0] * stations
+    busy_time = [0.0] * stations
+    number_time_integral = [0.0] * stations
+    queue_delay_total = [0.0] * stations
+    sojourn_total = [0.0] * stations
+    entered = {}  # customer -> time it entered the network
+    network_time = RunningMoments()
+
+    # One heap for every station: (time, kind, station, customer, station arrival time)
+    events = []
+    customers = 0
+    if inter_arrival_times is not None:
+        first = inter_arrival_times.next()
+        if first < simulation_time:
+            heapq.heappush(events, (first, EXTERNAL_ARRIVAL, entry_stations.next(), 0, first))
+
+    def set_number(station, now, change):
+        number_time_integral[station] += number[station] * (now - last_change[station])
+        last_change[station] = now
+        number[station] += change
+
+    def join(station, customer, now):
+        set_number(station, now, +1)
+        if free_servers[station]:
+            free_servers[station] -= 1
+            start(station, customer, now, now)
+        else:
+            queues[station].append((customer, now))
+
+    def start(station, customer, joined, now):
+        service_time = service_times.next() / service_rates[station]
+        busy_time[station] += service_time
+        queue_delay_total[station] += now - joined
+        heapq.heappush(events, (now + service_time, COMPLETION, station, customer, joined))
+
+    while events:
+        now, kind, station, customer, joined = heapq.heappop(events)
+        if kind == EXTERNAL_ARRIVAL:
+            customers += 1
+            customer = customers
+            entered[customer] = now
+            join(station, customer, now)
+            next_time = now + inter_arrival_times.next()
+            if next_time < simulation_time:
+                heapq.heappush(events, (next_time, EXTERNAL_ARRIVAL, entry_stations.next(), 0, next_time))
+            continue
+
+        # Service completion: free the server, then route the customer on
+        visits[station] += 1
+        sojourn_total[station] += now - joined
+        set_number(station, now, -1)
+        if queues[station]:
+            waiting, waiting_since = queues[station].popleft()
+            start(station, waiting, waiting_since, now)
+        else:
+            free_servers[station] += 1
+
+        cumulative, destinations = routes[station]
+        choice = bisect.bisect_right(cumulative, uniforms.next())
+        if choice < len(destinations):
+            join(destinations[choice], customer, now)
+        else:
+            network_time.update(now - entered.pop(customer))
+
+    end_time = max(last_change, default=0.0)
+    for station in range(stations):
+        set_number(station, end_time, 0)
+
+    return NetworkResult(
+        simulation_time=simulation_time,
+        customers=customers,
+        visits=np.array(visits, dtype=np.int64),
+        busy_time=np.array(busy_time),
+        number_time_integral=np.array(number_time_integral),
+        queue_delay_total=np.array(queue_delay_total),
+        sojourn_total=np.array(sojourn_total),
+        network_time=network_time,
+        c=np.array(c),
+    )
+
+
+if __name__ == '__main__':
+    # Tandem line with feedback: 1 -> 2 -> 3, and 3 sends 20% back to 1
+    external_rates = [1.0, 0.0, 0.0]
+    routing = [[0, 1, 0], [0, 0, 1], [0.2, 0, 0]]
+    service_rates = [2.0, 1.5, 3.0]
+    expected = jackson_metrics(external_rates, routing, service_rates)
+    result = simulate_network(external_rates, routing, service_rates, simulation_time=50_000, seed=42)
+    for station in range(3):
+        print(f"station {station + 1}: λ = {expected['arrival_rate'][station]:.3f} "
+              f"(simulated {result.throughput[station]:.3f}), "
+              f"L = {expected['L'][station]:.3f} (simulated {result.average_number[station]:.3f})")
+    print(f"time in network: {expected['network']['W']:.3f} (simulated {result.network_time.mean:.3f})")
@@ -0,0 +1,221 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from event_trace import load_trace, scene_states
+from render_cache import RenderCache
+from TracePlayer import TracePlayerScene
+
+# Segment-parallel rendering of a dumped M/M/c event trace.
+#
+# The trace is cut into segments at event boundaries. Each segment is
+# rendered by its own manim process, which lays out the scene without
+# animation, restores the snapshot of customers taken just before its first
+# event and plays only its own events. The partial videos are then joined
+# with ffmpeg's concat demuxer without re-encoding, so wall-clock time
+# shrinks with the number of cores for long traces.
+#
+#   QUEUE_TRACE_OUT=mmc_trace manim -ql MMcQueue.py MMCQueueScene
+#   python parallel_render.py mmc_trace mmc.mp4 --segments 8 --quality h
+#
+# With --cache, the static layout (servers, areas, text and MathTex labels)
+# is rendered once to an image that every later segment uses as its
+# background, and each segment video is stored under a hash of what it
+# draws (see render_cache.py). Segments are then cut every
+# --segment-events events, so that a change late in the trace keeps the
+# earlier cuts, and their content keys, where they were. Iterating on a
+# scene re-renders only the segments whose events actually changed.
+#
+#   python parallel_render.py mmc_trace mmc.mp4 --cache .render_cache --segment-events 200
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules whose code decides the pixels of a segment
+SOURCES = ('MMcQueue.py', 'queue_visuals.py', 'parallel_render.py')
+
+
+class MMCQueueSegmentScene(TracePlayerScene):
+    # Written by render_parallel: a JSON list of {start, stop, state}
+    segment_file = os.environ.get("QUEUE_SEGMENT_FILE")
+    segment_index = int(os.environ.get("QUEUE_SEGMENT_INDEX", "0"))
+    # Optional pre-rendered layout image, written by MMCQueueBackgroundScene
+    background = os.environ.get("QUEUE_BACKGROUND")
+
+    def construct(self):
+        trace = self.get_trace()
+        with open(self.segment_file) as f:
+            segment = json.load(f)[self.segment_index]
+
+        # Only the first segment animates the layout and only the last one
+        # shows the statistics
+        first = segment['start'] == 0
+        self.setup_layout(trace, animate=first, background=None if first else self.background)
+        if not first:
+            self.restore_state(segment['state'])
+        self.play_events(trace, segment['start'], segment['stop'])
+        if segment['stop'] == len(trace):
+            self.show_statistics(trace)
+
+
+class MMCQueueBackgroundScene(TracePlayerScene):
+    # Rendered with -s: its last frame is the finished layout without customers
+    def construct(self):
+        self.setup_layout(self.get_trace(), animate=False)
+
+
+def segment_bounds(event_count, segments):
+    """Split [0, event_count) into up to `segments` contiguous event ranges."""
+    bounds = np.unique(np.linspace(0, event_count, segments + 1).astype(np.int64))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist())) or [(0, 0)]
+
+
+def stride_bounds(event_count, segment_events):
+    """Split [0, event_count) into ranges of segment_events events (the last may be shorter)."""
+    starts = list(range(0, event_count, segment_events)) or [0]
+    return [(start, min(start + segment_events, event_count)) for start in starts]
+
+
+def code_digest():
+    """Digest of the drawing code and the manim version, part of every cache key."""
+    import manim
+
+    digest = hashlib.sha256(manim.__version__.encode())
+    for name in SOURCES:
+        with open(os.path.join(HERE, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def layout_description(trace, quality, code):
+    # Everything the static layout shows: the labels and the number of servers
+    return {
+        'layer': 'background',
+        'parameters': {name: trace.metadata[name] for name in ('arrival_rate', 'service_rate', 'c')},
+        'quality': quality,
+        'code': code,
+    }
+
+
+def segment_description(trace, start, stop, state, quality, code):
+    """What the segment [start, stop) draws, as a JSON-able dict to hash.
+
+    Playback shows the order of events rather than their times, so the
+    event, customer and server columns of the slice identify it together
+    with the customers on screen when it starts. Every segment also shows
+    the layout with its parameter labels, animated in the first and as the
+    background still in the others, so the layout description is part of
+    each key. The last segment shows the statistics as well.
+    """
+    events = hashlib.sha256()
+    for name in ('event', 'customer', 'server'):
+        events.update(np.ascontiguousarray(trace[name][start:stop]).tobytes())
+    description = {
+        'layer': 'segment',
+        'c': trace.metadata['c'],
+        'events': events.hexdigest(),
+        'state': state,
+        'quality': quality,
+        'code': code,
+        'layout': layout_description(trace, quality, code),
+    }
+    if stop == len(trace):
+        description['statistics'] = trace.statistics()
+    return description
+
+
+def render_parallel(trace_path, output, segments=None, processes=None, quality='l', work_dir=None,
+                    cache=None, segment_events=None):
+    """Render the trace at `trace_path` into `output` using one process per segment.
+
+    With a RenderCache, only segments missing from it are rendered; with
+    segment_events, segments are cut every that many events instead of
+    into `segments` equal parts.
+    """
+    segments = segments or os.cpu_count()
+    trace_path = os.path.abspath(trace_path)
+    trace = load_trace(trace_path)
+    if segment_events:
+        bounds = stride_bounds(len(trace), segment_events)
+    else:
+        bounds = segment_bounds(len(trace), segments)
+    states = scene_states(trace, [start for start, _ in bounds])
+
+    work_dir = os.path.abspath(work_dir or tempfile.mkdtemp(prefix='queue_segments_'))
+    os.makedirs(work_dir, exist_ok=True)
+    segment_file = os.path.join(work_dir, 'segments.json')
+    with open(segment_file, 'w') as f:
+        json.dump([{'start': start, 'stop': stop, 'state': state}
+                   for (start, stop), state in zip(bounds, states)], f)
+
+    def render(scene, name, env, still=False):
+        media_dir = os.path.join(work_dir, name)
+        subprocess.run(
+            [sys.executable, '-m', 'manim', 'render', f'-q{quality}', *(['-s'] if still else []),
+             '--media_dir', media_dir, '-o', name, os.path.join(HERE, 'parallel_render.py'), scene],
+            cwd=HERE, env=dict(os.environ, QUEUE_TRACE=trace_path, **env), check=True, stdout=subprocess.DEVNULL,
+        )
+        if still:
+            pattern = os.path.join(media_dir, 'images', '**', f'{name}*.png')
+        else:
+            pattern = os.path.join(media_dir, 'videos', '**', f'{name}.mp4')
+        return glob.glob(pattern, recursive=True)[0]
+
+    background = None
+    keys = [None] * len(bounds)
+    videos = [None] * len(bounds)
+    if cache is not None:
+        code = code_digest()
+        keys = [cache.key(segment_description(trace, start, stop, state, quality, code))
+                for (start, stop), state in zip(bounds, states)]
+        videos = [cache.get(key, '.mp4') for key in keys]
+        if any(video is None for video in videos[1:]):
+            background_key = cache.key(layout_description(trace, quality, code))
+            background = cache.get(background_key, '.png')
+            if background is None:
+                background = cache.put(background_key, '.png', render('MMCQueueBackgroundScene', 'background', {}, still=True))
+
+    def render_segment(index):
+        env = {'QUEUE_SEGMENT_FILE': segment_file, 'QUEUE_SEGMENT_INDEX': str(index)}
+        if background is not None:
+            env['QUEUE_BACKGROUND'] = background
+        video = render('MMCQueueSegmentScene', f'segment_{index:04d}', env)
+        return video if cache is None else cache.put(keys[index], '.mp4', video)
+
+    missing = [index for index, video in enumerate(videos) if video is None]
+    # Threads only wait on the manim processes, which do the actual work
+    with ThreadPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+        for index, video in zip(missing, executor.map(render_segment, missing)):
+            videos[index] = video
+
+    concat_list = os.path.join(work_dir, 'segments.txt')
+    with open(concat_list, 'w') as f:
+        f.writelines(f"file '{video}'\n" for video in videos)
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                    '-i', concat_list, '-c', 'copy', os.path.abspath(output)], check=True)
+    if cache is not None:
+        cache.evict()
+    return output
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render an M/M/c event trace in parallel segments.")
+    parser.add_argument('trace', help="trace written with QUEUE_TRACE_OUT (.npz file or directory)")
+    parser.add_argument('output', help="video file to write, e.g. mmc.mp4")
+    parser.add_argument('--segments', type=int, default=None, help="number of segments (default: CPU count)")
+    parser.add_argument('--processes', type=int, default=None, help="concurrent renders (default: CPU count)")
+    parser.add_argument('--quality', default='l', choices='lmhpk', help="manim quality flag")
+    parser.add_argument('--cache', default=None, help="render cache directory; reuses unchanged segments")
+    parser.add_argument('--segment-events', type=int, default=None,
+                        help="cut a segment every N events instead of into --segments equal parts")
+    args = parser.parse_args()
+    cache = RenderCache(args.cache) if args.cache else None
+    render_parallel(args.trace, args.output, args.segments, args.processes, args.quality,
+                    cache=cache, segment_events=args.segment_events)
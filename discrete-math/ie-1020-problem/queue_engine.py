@@ -0,0 +1,754 @@
+import heapq
+import math
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from analytic import mmc_metrics
+from disciplines import waiting_line
+from rates import PoissonArrivals, expected_arrivals, initial, is_profile, peak, staffing_changes
+from streaming_stats import StreamingStatistics
+from variates import Categorical, VariateSource, as_distribution
+
+# Render-free M/M/c simulation engine shared by the queue scenes.
+#
+# The scenes used to run the event loop inside Scene.construct and call
+# self.play on every event, so a simulation could not run without manim.
+# Here the same loop runs on plain Python state and the scenes only play
+# back the recorded events.
+
+# Event codes used in the recorded event log
+ARRIVAL = 0
+SERVICE_START = 1
+DEPARTURE = 2
+STAFFING = 3  # server column holds the new staffing level
+PREEMPT = 4  # customer goes back to the waiting line; server column holds the server it left
+
+# Bump whenever a change alters simulated results for the same inputs and
+# seed; cached sweep results (sweep.py) are keyed on it
+ENGINE_VERSION = 1
+
+
+class InverseTransformGenerator:
+    """Exponential variates by inversion, X = -scale * log(U), from one uniform each.
+
+    The antithetic twin uses 1 - U instead, so a pair of runs on the same
+    seed gets negatively correlated inputs. Uniforms are midpoints of a
+    2^52 grid, which keeps both U and 1 - U strictly inside (0, 1).
+    """
+
+    def __init__(self, rng, antithetic=False):
+        self.rng = rng
+        self.antithetic = antithetic
+
+    def random(self, size=None):
+        u = (self.rng.integers(0, 1 << 52, size=size) + 0.5) / (1 << 52)
+        return 1.0 - u if self.antithetic else u
+
+    def standard_exponential(self, size=None):
+        return -np.log(self.random(size))
+
+    def exponential(self, scale=1.0, size=None):
+        return scale * self.standard_exponential(size)
+
+
+def make_streams(seed=None, antithetic=None, count=2):
+    """Return independent (arrival, service) generators derived from one seed.
+
+    Keeping arrivals and services on separate streams means the n-th
+    customer always gets the same inter-arrival and service time, no matter
+    how events interleave or how many servers there are. Runs that share a
+    seed therefore see common random numbers, e.g. when comparing c=3 with
+    c=4.
+
+    antithetic=None uses NumPy's own samplers. False and True draw by
+    inversion instead, from U and from 1 - U, which gives the two halves of
+    an antithetic pair.
+
+    count > 2 adds further independent streams (e.g. customer classes)
+    after the arrival and service ones, which stay the same.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        seed_sequence = seed
+    else:
+        seed_sequence = np.random.SeedSequence(seed)
+    streams = tuple(np.random.default_rng(child) for child in seed_sequence.spawn(count))
+    if antithetic is None:
+        return streams
+    return tuple(InverseTransformGenerator(rng, antithetic) for rng in streams)
+
+
+@dataclass
+class SimulationResult:
+    """Per-customer records and time integrals of one simulated sample path.
+
+    Runs with keep_customers=False leave the per-customer arrays empty and
+    carry a StreamingStatistics summary instead.
+    """
+
+    simulation_time: float
+    c: int
+    customer_count: int
+    arrival_times: np.ndarray
+    service_start_times: np.ndarray
+    departure_times: np.ndarray
+    servers: np.ndarray
+    queue_time_integral: float
+    busy_time: np.ndarray
+    end_time: float
+    events: dict = None
+    statistics: StreamingStatistics = None
+    classes: np.ndarray = None  # Customer classes of multi-class runs
+    class_statistics: dict = None  # StreamingStatistics per class
+
+    @property
+    def waiting_times(self):
+        # Time in system (departure - arrival), which is what the scenes
+        # have always reported as "waiting time"
+        return self.departure_times - self.arrival_times
+
+    @property
+    def queue_delays(self):
+        # Time spent in the waiting line only
+        return self.service_start_times - self.arrival_times
+
+    @property
+    def average_waiting_time(self):
+        if self.customer_count == 0:
+            return 0.0
+        if len(self.arrival_times) == 0:
+            return self.statistics.waiting_time.mean
+        return float(np.mean(self.waiting_times))
+
+    @property
+    def average_queue_delay(self):
+        if self.customer_count == 0:
+            return 0.0
+        if len(self.arrival_times) == 0:
+            return self.statistics.queue_delay.mean
+        return float(np.mean(self.queue_delays))
+
+    @property
+    def average_queue_length(self):
+        # Same definition as the scenes: the queue-length integral over the
+        # whole run (including the drain after the horizon) divided by the horizon
+        return self.queue_time_integral / self.simulation_time
+
+    @property
+    def utilization(self):
+        # Fraction of the run each server spent busy
+        return self.busy_time / max(self.simulation_time, self.end_time)
+
+
+class MMcSimulation:
+    """Event-driven M/M/c FIFO queue, the loop from MMcQueue.py without manim.
+
+    Arrivals are accepted while their arrival time is before the horizon;
+    customers still in the system at the horizon are served to completion.
+
+    arrival_rate and c may also be piecewise-constant profiles, either
+    (breakpoints, values) pairs or rates.PiecewiseConstant. Arrivals then follow a non-homogeneous Poisson
+    process and the number of servers on shift follows c(t). When staffing
+    drops, busy servers above the new level finish their customer first.
+
+    Either rate may instead be a distribution from variates.py (of
+    inter-arrival or service times), which turns the model into G/G/c.
+
+    discipline picks the waiting-line order (see disciplines.py). With
+    class_probabilities each arrival gets a class 0..k-1 (0 served first by
+    the priority disciplines) and per-class statistics are collected;
+    round_robin serves in slices of `quantum`. Service times are drawn on
+    arrival, so the n-th customer gets the same one under every discipline.
+    """
+
+    def __init__(self, arrival_rate, service_rate, c=1, seed=None, record_events=False,
+                 keep_customers=True, statistics=None, antithetic=None, discipline='fifo',
+                 class_probabilities=None, quantum=1.0):
+        self.arrival_rate = arrival_rate
+        self.service_rate = service_rate
+        self.c = peak(c)  # Servers that are ever on shift
+        self.record_events = record_events
+
+        # Without per-customer records, summaries go to a constant-memory collector
+        self.keep_customers = keep_customers
+        if statistics is None and not keep_customers:
+            statistics = StreamingStatistics()
+        self.statistics = statistics
+        streams = make_streams(seed, antithetic, count=2 if class_probabilities is None else 3)
+        self.arrival_rng, self.service_rng = streams[:2]
+        self.arrivals = PoissonArrivals(self.arrival_rng, arrival_rate) if is_profile(arrival_rate) else None
+        self.inter_arrival_times = None if is_profile(arrival_rate) else VariateSource(self.arrival_rng, arrival_rate)
+        self.service_times = VariateSource(self.service_rng, service_rate)
+
+        # Customer classes and scheduling
+        self.discipline = discipline
+        self.preemptive = discipline == 'preemptive'
+        self.quantum = quantum if discipline == 'round_robin' else None
+        self.customer_classes = None
+        self.class_statistics = None
+        if class_probabilities is not None:
+            self.customer_classes = VariateSource(streams[2], Categorical(class_probabilities))
+            self.class_statistics = {k: StreamingStatistics() for k in range(len(class_probabilities))}
+
+        # Staffing schedule
+        self.staffing_level = initial(c)
+        self.staffing_changes = deque(staffing_changes(c) if is_profile(c) else [])
+        self.next_staffing_time = self.staffing_changes[0][0] if self.staffing_changes else math.inf
+
+        # Simulation state
+        c = self.c
+        self.current_time = 0.0
+        self.customer_count = 0
+        # [arrival_time, service_start_time, remaining_work, class] of the
+        # customers currently in the system
+        self.open_customers = {}
+        self.queue = waiting_line(discipline, self.open_customers)
+        self.server_busy = [False] * c
+        self.next_arrival_time = self.get_next_arrival_time()
+        self.next_departure_times = [math.inf] * c
+        self.current_customers = [None] * c
+
+        # Event calendar of pending (departure_time, server) pairs and a heap of
+        # idle server indices, so picking the next event and the first free
+        # server are O(log c) instead of scans over all servers
+        # (time, server, token) entries; a token that no longer matches the
+        # server's marks an entry cancelled by preemption
+        self.departure_calendar = []
+        self.free_servers = list(range(self.staffing_level))
+        self.service_tokens = [0] * c
+        self.slice_lengths = [0.0] * c  # Work done by the current service or slice
+
+        # Per-customer records, indexed by customer id - 1 (only with keep_customers)
+        self.arrival_times = []
+        self.service_start_times = []
+        self.departure_times = []
+        self.servers = []
+        self.classes = []
+
+        # Time integrals
+        self.last_event_time = 0.0
+        self.cumulative_queue_time = 0.0
+        self.busy_time = [0.0] * c
+
+        # Event log as parallel columns
+        self.event_times = []
+        self.event_types = []
+        self.event_customers = []
+        self.event_servers = []
+
+    def get_inter_arrival_time(self):
+        return self.inter_arrival_times.next()
+
+    def get_next_arrival_time(self):
+        if self.arrivals is not None:
+            return self.arrivals.next()
+        return self.current_time + self.get_inter_arrival_time()
+
+    def get_service_time(self):
+        return self.service_times.next()
+
+    def run(self, simulation_time, drain=True):
+        """Simulate up to the horizon and return the result.
+
+        By default customers still in the system at the horizon are served
+        to completion. With drain=False the run instead pauses at
+        simulation_time with its state intact: a later run(longer_time)
+        continues it exactly as if it had been one run, e.g. after a
+        snapshot/restore round trip (see checkpoint.py).
+        """
+        calendar = self.departure_calendar
+        tokens = self.service_tokens
+        while True:
+            while calendar and calendar[0][2] != tokens[calendar[0][1]]:
+                heapq.heappop(calendar)  # Cancelled by a preemption
+            next_departure_time = calendar[0][0] if calendar else math.inf
+            next_arrival_time = self.next_arrival_time if self.next_arrival_time < simulation_time else math.inf
+            next_staffing_time = self.next_staffing_time
+
+            if not drain and min(next_arrival_time, next_departure_time, next_staffing_time) >= simulation_time:
+                if self.current_time < simulation_time:
+                    self._advance_clock(simulation_time)
+                break
+
+            # Shift changes come first on ties and, unless pausing, only
+            # matter while customers remain
+            pending = not drain or self.queue or calendar or next_arrival_time < math.inf
+            staffing_due = next_staffing_time <= min(next_arrival_time, next_departure_time)
+            if pending and staffing_due and next_staffing_time < math.inf:
+                self._staffing_change()
+            elif next_arrival_time <= next_departure_time and next_arrival_time < math.inf:
+                self._arrival()
+            elif calendar:
+                self._departure(heapq.heappop(calendar)[1])
+            else:
+                break
+        return self.result(simulation_time)
+
+    def snapshot(self):
+        """The full run state as plain data: numbers, lists, dicts and NumPy arrays.
+
+        Together with the constructor arguments it fixes the rest of the
+        run, random streams included. Take it after run(..., drain=False).
+        """
+        arrivals = self.arrivals if self.arrivals is not None else self.inter_arrival_times
+        return {
+            'engine_version': ENGINE_VERSION,
+            'c': self.c,
+            'discipline': self.discipline,
+            'arrivals': arrivals.state(),
+            'service_times': self.service_times.state(),
+            'customer_classes': self.customer_classes.state() if self.customer_classes is not None else None,
+            'staffing_level': self.staffing_level,
+            'staffing_changes': [list(change) for change in self.staffing_changes],
+            'next_staffing_time': self.next_staffing_time,
+            'current_time': self.current_time,
+            'customer_count': self.customer_count,
+            'open_customers': [[customer, *record] for customer, record in self.open_customers.items()],
+            'queue': list(self.queue),
+            'server_busy': self.server_busy,
+            'next_arrival_time': self.next_arrival_time,
+            'next_departure_times': self.next_departure_times,
+            'current_customers': self.current_customers,
+            'departure_calendar': [list(entry) for entry in self.departure_calendar],
+            'free_servers': self.free_servers,
+            'service_tokens': self.service_tokens,
+            'slice_lengths': self.slice_lengths,
+            'customers': {
+                'arrival_times': np.array(self.arrival_times, dtype=np.float64),
+                'service_start_times': np.array(self.service_start_times, dtype=np.float64),
+                'departure_times': np.array(self.departure_times, dtype=np.float64),
+                'servers': np.array(self.servers, dtype=np.int64),
+                'classes': np.array(self.classes, dtype=np.int64),
+            },
+            'last_event_time': self.last_event_time,
+            'cumulative_queue_time': self.cumulative_queue_time,
+            'busy_time': self.busy_time,
+            'events': {
+                'time': np.array(self.event_times, dtype=np.float64),
+                'event': np.array(self.event_types, dtype=np.int8),
+                'customer': np.array(self.event_customers, dtype=np.int64),
+                'server': np.array(self.event_servers, dtype=np.int32),
+            },
+            'statistics': self.statistics.state() if self.statistics is not None else None,
+            'class_statistics': None if self.class_statistics is None else
+            {str(k): statistics.state() for k, statistics in self.class_statistics.items()},
+        }
+
+    def restore(self, state):
+        """Continue from a snapshot() of a run built with the same arguments."""
+        if state['engine_version'] != ENGINE_VERSION:
+            raise ValueError(f"snapshot is from engine version {state['engine_version']}, this is {ENGINE_VERSION}")
+        if state['c'] != self.c or state['discipline'] != self.discipline:
+            raise ValueError("snapshot was taken with a different number of servers or discipline")
+
+        arrivals = self.arrivals if self.arrivals is not None else self.inter_arrival_times
+        arrivals.load_state(state['arrivals'])
+        self.service_times.load_state(state['service_times'])
+        if self.customer_classes is not None:
+            self.customer_classes.load_state(state['customer_classes'])
+
+        self.staffing_level = state['staffing_level']
+        self.staffing_changes = deque((float(t), int(level)) for t, level in state['staffing_changes'])
+        self.next_staffing_time = state['next_staffing_time']
+        self.current_time = state['current_time']
+        self.customer_count = state['customer_count']
+        # The waiting line's keys look customers up in this very dict, so refill it in place
+        self.open_customers.clear()
+        self.open_customers.update({int(customer): list(record) for customer, *record in state['open_customers']})
+        self.queue = waiting_line(self.discipline, self.open_customers)
+        for customer in state['queue']:
+            self.queue.append(customer)
+        self.server_busy = list(state['server_busy'])
+        self.next_arrival_time = state['next_arrival_time']
+        self.next_departure_times = list(state['next_departure_times'])
+        self.current_customers = list(state['current_customers'])
+        self.departure_calendar = [tuple(entry) for entry in state['departure_calendar']]
+        self.free_servers = list(state['free_servers'])
+        self.service_tokens = list(state['service_tokens'])
+        self.slice_lengths = list(state['slice_lengths'])
+
+        customers = state['customers']
+        self.arrival_times = customers['arrival_times'].tolist()
+        self.service_start_times = customers['service_start_times'].tolist()
+        self.departure_times = customers['departure_times'].tolist()
+        self.servers = customers['servers'].tolist()
+        self.classes = customers['classes'].tolist()
+
+        self.last_event_time = state['last_event_time']
+        self.cumulative_queue_time = state['cumulative_queue_time']
+        self.busy_time = list(state['busy_time'])
+
+        events = state['events']
+        self.event_times = events['time'].tolist()
+        self.event_types = events['event'].tolist()
+        self.event_customers = events['customer'].tolist()
+        self.event_servers = events['server'].tolist()
+
+        if state['statistics'] is not None:
+            if self.statistics is None:
+                self.statistics = StreamingStatistics()
+            self.statistics.load_state(state['statistics'])
+        if self.class_statistics is not None:
+            for k, statistics in self.class_statistics.items():
+                statistics.load_state(state['class_statistics'][str(k)])
+        return self
+
+    def result(self, simulation_time):
+        if self.statistics is not None:
+            self.statistics.flush()
+        events = None
+        if self.record_events:
+            events = {
+                'time': np.array(self.event_times, dtype=np.float64),
+                'event': np.array(self.event_types, dtype=np.int8),
+                'customer': np.array(self.event_customers, dtype=np.int64),
+                'server': np.array(self.event_servers, dtype=np.int32),
+            }
+        return SimulationResult(
+            simulation_time=simulation_time,
+            c=self.c,
+            customer_count=self.customer_count,
+            arrival_times=np.array(self.arrival_times, dtype=np.float64),
+            service_start_times=np.array(self.service_start_times, dtype=np.float64),
+            departure_times=np.array(self.departure_times, dtype=np.float64),
+            servers=np.array(self.servers, dtype=np.int64),
+            queue_time_integral=self.cumulative_queue_time,
+            busy_time=np.array(self.busy_time, dtype=np.float64),
+            end_time=self.current_time,
+            events=events,
+            statistics=self.statistics,
+            classes=np.array(self.classes, dtype=np.int64) if self.customer_classes is not None else None,
+            class_statistics=self.class_statistics,
+        )
+
+    def _advance_clock(self, event_time):
+        # Update cumulative queue time
+        if self.statistics is not None:
+            self.statistics.record_queue(len(self.queue), event_time - self.last_event_time)
+        self.cumulative_queue_time += len(self.queue) * (event_time - self.last_event_time)
+        self.last_event_time = event_time
+        self.current_time = event_time
+
+    def _record(self, event_type, customer, server):
+        if self.record_events:
+            self.event_times.append(self.current_time)
+            self.event_types.append(event_type)
+            self.event_customers.append(customer)
+            self.event_servers.append(server)
+
+    def _arrival(self):
+        self._advance_clock(self.next_arrival_time)
+        self.customer_count += 1
+        customer = self.customer_count
+        customer_class = self.customer_classes.next() if self.customer_classes is not None else 0
+        self.open_customers[customer] = [self.current_time, math.nan, self.get_service_time(), customer_class]
+        if self.keep_customers:
+            self.arrival_times.append(self.current_time)
+            self.service_start_times.append(math.nan)
+            self.departure_times.append(math.nan)
+            self.servers.append(-1)
+            if self.customer_classes is not None:
+                self.classes.append(customer_class)
+
+        # Assign to the first free server, otherwise join the queue. The
+        # arrival event records that server, or -1 when the customer queues.
+        if self.free_servers:
+            server_index = heapq.heappop(self.free_servers)
+            self._record(ARRIVAL, customer, server_index)
+            self._start_service(customer, server_index)
+        else:
+            # Under preemptive priority a lower-class customer may have to make room
+            server_index = self._preemptable_server(customer_class) if self.preemptive else -1
+            if server_index >= 0:
+                self._record(ARRIVAL, customer, server_index)
+                self._preempt(server_index)
+                self._start_service(customer, server_index)
+            else:
+                self._record(ARRIVAL, customer, -1)
+                self.queue.append(customer)
+
+        # Schedule next arrival
+        self.next_arrival_time = self.get_next_arrival_time()
+
+    def _preemptable_server(self, customer_class):
+        # On-shift server whose customer has the lowest priority below customer_class, or -1
+        victim, victim_class = -1, customer_class
+        for server_index, other in enumerate(self.current_customers[:self.staffing_level]):
+            if other is not None and self.open_customers[other][3] > victim_class:
+                victim, victim_class = server_index, self.open_customers[other][3]
+        return victim
+
+    def _preempt(self, server_index):
+        # Preemptive resume: the displaced customer keeps its remaining work
+        customer = self.current_customers[server_index]
+        unfinished = self.next_departure_times[server_index] - self.current_time
+        self.open_customers[customer][2] -= self.slice_lengths[server_index] - unfinished
+        self.busy_time[server_index] -= unfinished
+        self.service_tokens[server_index] += 1  # Cancels the pending departure
+        self.current_customers[server_index] = None
+        self._record(PREEMPT, customer, server_index)
+        self.queue.append(customer)
+
+    def _departure(self, server_index):
+        self._advance_clock(self.next_departure_times[server_index])
+        customer = self.current_customers[server_index]
+        self.current_customers[server_index] = None
+        work = self.open_customers[customer]
+        work[2] -= self.slice_lengths[server_index]
+        if work[2] > 0:
+            # End of a round-robin slice: back to the end of the line
+            self._record(PREEMPT, customer, server_index)
+            self.queue.append(customer)
+        else:
+            arrival_time, service_start_time, _, customer_class = self.open_customers.pop(customer)
+            if self.keep_customers:
+                self.departure_times[customer - 1] = self.current_time
+            if self.statistics is not None:
+                self.statistics.record_customer(arrival_time, service_start_time, self.current_time)
+            if self.class_statistics is not None:
+                self.class_statistics[customer_class].record_customer(arrival_time, service_start_time,
+                                                                      self.current_time)
+            self._record(DEPARTURE, customer, server_index)
+
+        on_shift = server_index < self.staffing_level
+        if on_shift and self.queue:
+            self._start_service(self.queue.popleft(), server_index)
+        else:
+            self.server_busy[server_index] = False
+            self.next_departure_times[server_index] = math.inf
+            if on_shift:
+                heapq.heappush(self.free_servers, server_index)
+
+    def _staffing_change(self):
+        change_time, level = self.staffing_changes.popleft()
+        self._advance_clock(change_time)
+        self.next_staffing_time = self.staffing_changes[0][0] if self.staffing_changes else math.inf
+        previous_level, self.staffing_level = self.staffing_level, level
+        self._record(STAFFING, 0, level)
+
+        if level < previous_level:
+            # Idle servers above the new level go off shift straight away
+            self.free_servers = [i for i in self.free_servers if i < level]
+            heapq.heapify(self.free_servers)
+        else:
+            # Servers coming on shift (unless still finishing a customer) take from the queue
+            for i in range(previous_level, level):
+                if not self.server_busy[i]:
+                    heapq.heappush(self.free_servers, i)
+            while self.queue and self.free_servers:
+                self._start_service(self.queue.popleft(), heapq.heappop(self.free_servers))
+
+    def _start_service(self, customer, server_index):
+        record = self.open_customers[customer]
+        service_time = record[2] if self.quantum is None else min(record[2], self.quantum)
+        self.server_busy[server_index] = True
+        self.current_customers[server_index] = customer
+        self.slice_lengths[server_index] = service_time
+        self.next_departure_times[server_index] = self.current_time + service_time
+        self.service_tokens[server_index] += 1
+        heapq.heappush(self.departure_calendar,
+                       (self.current_time + service_time, server_index, self.service_tokens[server_index]))
+        self.busy_time[server_index] += service_time
+        if math.isnan(record[1]):
+            # Queue delay runs until the first time the customer is served
+            record[1] = self.current_time
+            if self.keep_customers:
+                self.service_start_times[customer - 1] = self.current_time
+                self.servers[customer - 1] = server_index
+        self._record(SERVICE_START, customer, server_index)
+
+
+def arrival_time_chunks(rng, arrival_rate, simulation_time, chunk_size=1 << 18):
+    """Yield the arrival times before the horizon as consecutive arrays.
+
+    Consumes the stream in the same order as repeated calls to
+    get_inter_arrival_time (or PoissonArrivals.next for a λ(t) profile), so
+    the n-th arrival matches the event loop. arrival_rate may also be an
+    inter-arrival distribution.
+    """
+    # Short runs draw one block of about the expected size, long ones stream
+    if is_profile(arrival_rate):
+        expected = expected_arrivals(arrival_rate, simulation_time)
+    else:
+        inter_arrival = as_distribution(arrival_rate)
+        expected = simulation_time / inter_arrival.mean
+    chunk_size = min(chunk_size, int(expected + 5 * math.sqrt(expected)) + 16)
+
+    if is_profile(arrival_rate):
+        draw = PoissonArrivals(rng, arrival_rate, block_size=chunk_size).draw_block
+    else:
+        last_arrival = 0.0
+
+        def draw():
+            nonlocal last_arrival
+            block = last_arrival + np.cumsum(inter_arrival.sample(rng, chunk_size))
+            last_arrival = block[-1]
+            return block
+
+    while True:
+        block = draw()
+        stop = np.searchsorted(block, simulation_time)
+        if stop:
+            yield block[:stop]
+        if stop < len(block):
+            return
+
+
+def simulate_mm1_vectorized(arrival_rate, service_rate, simulation_time, seed=None,
+                            keep_customers=True, statistics=None, chunk_size=1 << 18, antithetic=None):
+    """FIFO M/M/1 (or G/G/1) via the Lindley recursion evaluated with array operations.
+
+    Departures follow D[n] = max(D[n-1], A[n]) + S[n], which unrolls to
+    D[n] = C[n] + max(D[-1], max over k <= n of (A[k] - C[k-1])) with
+    C = cumsum(S) inside a chunk and D[-1] the last departure of the previous
+    chunk, i.e. one cumsum and one running maximum per chunk. Given the same
+    seed the result matches MMcSimulation with c=1 up to floating-point
+    rounding.
+
+    With keep_customers=False only one chunk of customers is in memory at a
+    time and the results go to a StreamingStatistics collector.
+    """
+    if statistics is None and not keep_customers:
+        statistics = StreamingStatistics()
+    arrival_rng, service_rng = make_streams(seed, antithetic)
+    service = as_distribution(service_rate)
+
+    customer_count = 0
+    last_departure = 0.0
+    queue_time_integral = 0.0
+    busy_time = 0.0
+    kept = []
+
+    # Queue-length steps not yet final: service starts can still interleave
+    # with the next chunk's arrivals
+    queue_tracker = _QueueLengthTracker(statistics) if statistics is not None else None
+
+    for arrival_times in arrival_time_chunks(arrival_rng, arrival_rate, simulation_time, chunk_size):
+        service_times = service.sample(service_rng, len(arrival_times))
+        cumulative_service = np.cumsum(service_times)
+        departure_times = cumulative_service + np.maximum(
+            np.maximum.accumulate(arrival_times - (cumulative_service - service_times)), last_departure
+        )
+        # Clamp away rounding so customers that found the server idle start exactly on arrival
+        service_start_times = np.maximum(departure_times - service_times, arrival_times)
+
+        # Every customer contributes its queue delay to the queue-length integral
+        queue_time_integral += float(np.sum(service_start_times - arrival_times))
+        busy_time += float(service_times.sum())
+        customer_count += len(arrival_times)
+        last_departure = float(departure_times[-1])
+
+        if keep_customers:
+            kept.append((arrival_times, service_start_times, departure_times))
+        if statistics is not None:
+            statistics.record_customers(arrival_times, service_start_times, departure_times)
+            queue_tracker.add(arrival_times, service_start_times)
+
+    if queue_tracker is not None:
+        queue_tracker.finish(last_departure)
+
+    if kept:
+        arrival_times, service_start_times, departure_times = (np.concatenate(columns) for columns in zip(*kept))
+    else:
+        arrival_times = service_start_times = departure_times = np.empty(0)
+
+    return SimulationResult(
+        simulation_time=simulation_time,
+        c=1,
+        customer_count=customer_count,
+        arrival_times=arrival_times,
+        service_start_times=service_start_times,
+        departure_times=departure_times,
+        servers=np.zeros(len(arrival_times), dtype=np.int64),
+        queue_time_integral=queue_time_integral,
+        busy_time=np.array([busy_time]),
+        end_time=last_departure,
+        statistics=statistics,
+    )
+
+
+class _QueueLengthTracker:
+    # Feeds the time-weighted queue-length histogram from chunks of
+    # (arrival, service start) times. The queue length steps up at each
+    # arrival and down at each service start; steps before the chunk's last
+    # arrival are final, later service starts wait for the next chunk.
+
+    def __init__(self, statistics):
+        self.statistics = statistics
+        self.clock = 0.0
+        self.level = 0
+        self.pending_times = np.empty(0)
+        self.pending_steps = np.empty(0, dtype=np.int64)
+
+    def add(self, arrival_times, service_start_times):
+        times = np.concatenate([self.pending_times, arrival_times, service_start_times])
+        steps = np.concatenate([
+            self.pending_steps,
+            np.ones(len(arrival_times), dtype=np.int64),
+            -np.ones(len(service_start_times), dtype=np.int64),
+        ])
+        order = np.argsort(times, kind='stable')
+        times, steps = times[order], steps[order]
+        final = np.searchsorted(times, arrival_times[-1], side='left')
+        self._flush(times[:final], steps[:final])
+        self.pending_times, self.pending_steps = times[final:], steps[final:]
+
+    def finish(self, end_time):
+        self._flush(self.pending_times, self.pending_steps)
+        # The queue stays empty until the last departure
+        self.statistics.record_queue_batch([0], [max(end_time - self.clock, 0.0)])
+
+    def _flush(self, times, steps):
+        if len(times) == 0:
+            return
+        levels = self.level + np.concatenate([[0], np.cumsum(steps)[:-1]])
+        durations = np.diff(np.concatenate([[self.clock], times]))
+        self.statistics.record_queue_batch(levels, durations)
+        self.clock = float(times[-1])
+        self.level += int(steps.sum())
+
+
+def simulate_mmc(arrival_rate, service_rate, c, simulation_time, seed=None, record_events=False,
+                 keep_customers=True, antithetic=None, discipline='fifo', class_probabilities=None, quantum=1.0):
+    simulation = MMcSimulation(arrival_rate, service_rate, c, seed, record_events, keep_customers,
+                               antithetic=antithetic, discipline=discipline,
+                               class_probabilities=class_probabilities, quantum=quantum)
+    return simulation.run(simulation_time)
+
+
+def simulate_mm1(arrival_rate, service_rate, simulation_time, seed=None, record_events=False,
+                 keep_customers=True, antithetic=None, discipline='fifo', class_probabilities=None, quantum=1.0):
+    # The vectorized path is single-class FIFO without an event log; anything else gets the event loop
+    if record_events or discipline != 'fifo' or class_probabilities is not None:
+        return simulate_mmc(arrival_rate, service_rate, 1, simulation_time, seed, record_events, keep_customers,
+                            antithetic, discipline, class_probabilities, quantum)
+    return simulate_mm1_vectorized(arrival_rate, service_rate, simulation_time, seed, keep_customers,
+                                   antithetic=antithetic)
+
+
+def steady_state_metrics(arrival_rate, service_rate, c=1, target_time=0.0):
+    # Shortcut when only long-run averages are needed: closed-form M/M/c
+    # results instead of a simulation (accepts arrays for parameter grids)
+    return mmc_metrics(arrival_rate, service_rate, c, target_time)
+
+
+def validate(result, arrival_rate, service_rate):
+    """Compare a simulated run with the steady-state formulas it should approach.
+
+    Returns {metric: (simulated, expected, relative_error)}. Finite runs that
+    start empty sit below the steady state, most visibly close to rho = 1.
+    """
+    expected = mmc_metrics(arrival_rate, service_rate, result.c)
+    simulated = {
+        'Wq': result.average_queue_delay,
+        'W': result.average_waiting_time,
+        'Lq': result.average_queue_length,
+        'rho': float(result.utilization.mean()),
+    }
+    report = {}
+    for metric, value in simulated.items():
+        target = expected[metric]
+        error = abs(value - target) / target if target else abs(value)
+        report[metric] = (value, target, error)
+    return report
@@ -0,0 +1,289 @@
+from collections import deque
+
+from manim import *
+
+# Reusable waiting-line visual for the queue scenes.
+#
+# Slots are evenly spaced along one direction, so moving every waiting
+# customer up one slot is a single shift of the visible group rather than one
+# animation per customer. Only the first max_visible customers are drawn;
+# the rest are collapsed into a "+N" counter, which keeps the work per event
+# bounded no matter how long the queue grows.
+#
+# Building a Text mobject runs text layout and SVG parsing, the most
+# expensive part of handling an arrival. Labels are therefore assembled
+# from per-character glyphs rendered once and copied, and customers that
+# have faded out are handed back to a pool and relabelled for the next
+# arrival instead of being rebuilt.
+#
+# For long or busy simulations the scenes can also play back frame by frame:
+# frame_batches groups the events by the output frame they fall in, once
+# simulated time is compressed into video time, and FrameStage turns each
+# group into one set of concurrent animations; the FramePlayback mixin runs
+# that loop for a scene. Video length then follows the simulated horizon
+# rather than the number of events.
+
+
+class GlyphCache:
+    """Single-character Text mobjects, rendered once per (character, font_size)."""
+
+    def __init__(self):
+        self.glyphs = {}
+
+    def text(self, string, font_size=24):
+        glyphs = []
+        for character in string:
+            key = (character, font_size)
+            if key not in self.glyphs:
+                self.glyphs[key] = Text(character, font_size=font_size)
+            glyphs.append(self.glyphs[key].copy())
+        return VGroup(*glyphs).arrange(RIGHT, buff=0.02 * font_size / 24, aligned_edge=DOWN)
+
+
+GLYPHS = GlyphCache()
+
+
+class Customer(Circle):
+    def __init__(self, index, label_format="{}", font_size=24, **kwargs):
+        super().__init__(radius=0.3, **kwargs)
+        self.label_format = label_format
+        self.font_size = font_size
+        self.label = None
+        self.relabel(index)
+
+    def relabel(self, index):
+        """Give the circle a new customer number, e.g. when taken from a pool."""
+        if self.label is not None:
+            self.remove(self.label)
+        self.index = index
+        self.label = GLYPHS.text(self.label_format.format(index), self.font_size).move_to(self.get_center())
+        self.add(self.label)
+        self.arrival_time = None
+        self.departure_time = None
+
+
+class CustomerPool:
+    """Recycles Customer mobjects once they have left the scene.
+
+    Release a customer only after its FadeOut has been played; manim puts a
+    faded-out mobject back in its pre-fade state, so it can be shown again.
+    """
+
+    def __init__(self, **customer_kwargs):
+        self.customer_kwargs = customer_kwargs
+        self.free = []
+        self.created = 0
+
+    def acquire(self, index):
+        if self.free:
+            customer = self.free.pop()
+            customer.relabel(index)
+            return customer
+        self.created += 1
+        return Customer(index, **self.customer_kwargs)
+
+    def release(self, customer):
+        self.free.append(customer)
+
+
+class QueueLine:
+    def __init__(self, head, step, max_visible=8, counter_position=None, font_size=20):
+        self.head = np.array(head, dtype=float)
+        self.step = np.array(step, dtype=float)
+        self.max_visible = max_visible
+        self.font_size = font_size
+        if counter_position is None:
+            counter_position = self.slot(max_visible)
+        self.counter_position = np.array(counter_position, dtype=float)
+        self.counter = None  # "+N" label, only on screen while customers are hidden
+        self.counter_count = 0  # Number the counter currently shows
+        self.customers = deque()
+
+    def __len__(self):
+        return len(self.customers)
+
+    def __contains__(self, customer):
+        return customer in self.customers
+
+    def slot(self, i):
+        return self.head + self.step * i
+
+    @property
+    def hidden_count(self):
+        return max(0, len(self.customers) - self.max_visible)
+
+    def enqueue(self, customer):
+        """Append a customer without animating; see positions and sync_counter."""
+        self.customers.append(customer)
+
+    def dequeue(self):
+        return self.customers.popleft()
+
+    def positions(self):
+        """Slot of every visible customer."""
+        return {self.customers[i]: self.slot(i) for i in range(min(len(self.customers), self.max_visible))}
+
+    def sync_counter(self):
+        """Animations that bring the "+N" counter up to date, if it changed."""
+        if self.hidden_count == self.counter_count:
+            return []
+        return [self._update_counter()]
+
+    def join(self, customer):
+        """Append a customer and return the animations that show it joining."""
+        self.customers.append(customer)
+        if len(self.customers) <= self.max_visible:
+            return [customer.animate.move_to(self.slot(len(self.customers) - 1))]
+
+        # Beyond the visible length the customer folds into the counter
+        return [FadeOut(customer, target_position=self.counter_position), self._update_counter()]
+
+    def leave(self):
+        """Pop the front customer and return (customer, animations).
+
+        The animations advance the rest of the line by one slot as one group
+        and, when customers were hidden, reveal the next one in the last slot.
+        """
+        customer = self.customers.popleft()
+        visible = [self.customers[i] for i in range(min(len(self.customers), self.max_visible - 1))]
+        animations = []
+        if visible:
+            animations.append(VGroup(*visible).animate.shift(-self.step))
+        if len(self.customers) >= self.max_visible:
+            revealed = self.customers[self.max_visible - 1]
+            revealed.move_to(self.slot(self.max_visible - 1))
+            animations.append(FadeIn(revealed))
+            animations.append(self._update_counter())
+        return customer, animations
+
+    def restore(self, customers):
+        """Line customers up instantly, e.g. from a snapshot.
+
+        Returns the mobjects to add to the scene: the visible customers and
+        the "+N" counter when some are hidden.
+        """
+        self.customers.extend(customers)
+        visible = [self.customers[i] for i in range(min(len(self.customers), self.max_visible))]
+        for i, customer in enumerate(visible):
+            customer.move_to(self.slot(i))
+        if self.hidden_count:
+            self.counter_count = self.hidden_count
+            self.counter = GLYPHS.text(f"+{self.hidden_count}", self.font_size).move_to(self.counter_position)
+            return visible + [self.counter]
+        return visible
+
+    def _update_counter(self):
+        hidden = self.hidden_count
+        self.counter_count = hidden
+        if hidden == 0:
+            counter, self.counter = self.counter, None
+            return FadeOut(counter)
+
+        new_counter = GLYPHS.text(f"+{hidden}", self.font_size).move_to(self.counter_position)
+        if self.counter is None:
+            self.counter = new_counter
+            return FadeIn(new_counter)
+        return Transform(self.counter, new_counter)
+
+
+def frame_batches(events, time_compression, frame_rate, frames=1):
+    """Group time-ordered (time, ...) events by output frame.
+
+    Simulated time t is shown at video time t / time_compression. Yields
+    (video_time, events) for every window of `frames` frames that holds at
+    least one event; video_time is where the window starts.
+    """
+    window = frames / frame_rate
+    batch = []
+    current = None
+    for event in events:
+        index = int(event[0] / time_compression / window)
+        if index != current and batch:
+            yield current * window, batch
+            batch = []
+        current = index
+        batch.append(event)
+    if batch:
+        yield current * window, batch
+
+
+class FrameStage:
+    """Animates the net change of a frame's events in one go.
+
+    The scene applies every event of the frame to its state first and then
+    passes where each visible customer should end up. Customers that are new
+    fade in at that place, customers that are gone fade out and the rest
+    move straight there, so no customer gets two conflicting animations in
+    one play call. A customer that arrives and leaves inside one frame never
+    appears at all.
+    """
+
+    def __init__(self):
+        self.shown = {}  # Customer -> position at the end of the last frame
+
+    def animations(self, targets):
+        animations = [FadeOut(customer) for customer in self.shown if customer not in targets]
+        for customer, position in targets.items():
+            previous = self.shown.get(customer)
+            if previous is None:
+                customer.move_to(position)
+                animations.append(FadeIn(customer))
+            elif not np.allclose(previous, position):
+                animations.append(customer.animate.move_to(position))
+        self.shown = dict(targets)
+        return animations
+
+
+class FramePlayback:
+    """Scene mixin that plays a time-ordered event stream event by event or frame by frame.
+
+    The scene provides play_events(events), which gives every event its own
+    animations, and play_coalesced(events), which hands its state callbacks
+    to play_frames.
+    """
+
+    # Simulated time per second of video. None plays every event with its
+    # own animations; a number merges all events of an output frame into
+    # one play call, so the clip lasts max_time / time_compression seconds
+    time_compression = None
+    batch_frames = 1  # Frames per merged play call
+
+    def play_simulation(self, events):
+        if self.time_compression is None:
+            self.play_events(events)
+        else:
+            self.play_coalesced(events)
+
+    def play_frames(self, events, apply_event, service_positions, queue_lines):
+        """Play events with one merged play call per window of batch_frames frames.
+
+        apply_event(event) applies one event to the scene's state and returns
+        (pool, customer) for a departing customer, which goes back to its pool
+        once it has faded out, and None otherwise. service_positions() gives
+        {customer: position} for the customers in service; waiting customers
+        are placed by queue_lines.
+        """
+        stage = FrameStage()
+        window = self.batch_frames / config.frame_rate
+        video_time = 0
+
+        for start, batch in frame_batches(events, self.time_compression, config.frame_rate, self.batch_frames):
+            if start > video_time:
+                self.wait(start - video_time)
+                video_time = start
+
+            # Apply the whole frame to the scene state, then animate the net change
+            departed = [departure for departure in map(apply_event, batch) if departure is not None]
+
+            targets = service_positions()
+            animations = []
+            for queue_line in queue_lines:
+                targets.update(queue_line.positions())
+                animations += queue_line.sync_counter()
+            animations = stage.animations(targets) + animations
+            if animations:
+                self.play(*animations, run_time=window)
+                video_time = start + window
+
+            for pool, customer in departed:
+                pool.release(customer)
@@ -0,0 +1,145 @@
+import numpy as np
+
+from variates import generator_state, set_generator_state
+
+# Piecewise-constant time profiles for λ(t) and staffing c(t).
+#
+# A profile is a (breakpoints, values) pair: values[i] holds on
+# [breakpoints[i], breakpoints[i + 1]) and the last value holds forever.
+# Breakpoints start at 0 and increase.
+#
+# Arrivals of a non-homogeneous Poisson process are generated by inversion:
+# the points of a unit-rate Poisson process are mapped through the inverse
+# of the cumulative rate Λ(t), one NumPy block at a time.
+#
+# PiecewiseConstant holds a profile as NumPy arrays together with Λ at
+# every breakpoint, so evaluating it, Λ(t) or its inverse is one
+# searchsorted over any number of points. The module functions accept it
+# or a plain (breakpoints, values) pair.
+
+# The λ(t) profiles drawn in step_functions.py
+ONE_PULSE = ([0, 2, 4], [0.5, 2, 0.5])
+TWO_PULSES = ([0, 2, 4, 5, 7], [0.5, 1, 0.5, 1, 0.5])
+
+
+class PiecewiseConstant:
+    """Step function: values[i] on [breakpoints[i], breakpoints[i + 1]), the last value onwards."""
+
+    def __init__(self, breakpoints, values):
+        self.breakpoints = np.asarray(breakpoints, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.breakpoints.ndim != 1 or self.breakpoints.shape != self.values.shape or not len(self.values):
+            raise ValueError("breakpoints and values must be non-empty 1-D arrays of the same length")
+        if self.breakpoints[0] != 0 or (np.diff(self.breakpoints) <= 0).any():
+            raise ValueError("breakpoints must start at 0 and increase")
+        # Λ at every breakpoint
+        self.cumulative = np.concatenate([[0.0], np.cumsum(np.diff(self.breakpoints) * self.values[:-1])])
+
+    def __len__(self):
+        # Number of pieces; to_profile gives the (breakpoints, values) pair
+        return len(self.values)
+
+    def _index(self, t):
+        return np.maximum(np.searchsorted(self.breakpoints, t, side='right') - 1, 0)
+
+    def __call__(self, t):
+        return self.values[self._index(t)]
+
+    def integral(self, t):
+        """Λ(t), the integral from 0 to t."""
+        index = self._index(t)
+        return self.cumulative[index] + self.values[index] * (np.asarray(t) - self.breakpoints[index])
+
+    def inverse_integral(self, y):
+        """Smallest t with Λ(t) = y; inf when Λ never reaches y."""
+        # side='right' skips zero-rate pieces, where Λ stays flat
+        index = np.maximum(np.searchsorted(self.cumulative, y, side='right') - 1, 0)
+        values = self.values[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = self.breakpoints[index] + (np.asarray(y) - self.cumulative[index]) / values
+        return np.where(values > 0, t, np.inf)
+
+    def corners(self, start, end):
+        """Vertices of the graph on [start, end] as an (n, 2) array, to draw it as one polyline."""
+        inner = self.breakpoints[(self.breakpoints > start) & (self.breakpoints < end)]
+        times = np.concatenate([[start], np.repeat(inner, 2), [end]])
+        levels = np.repeat(self(np.concatenate([[start], inner])), 2)
+        return np.column_stack([times, levels])
+
+    def to_profile(self):
+        """(breakpoints, values) as lists, e.g. for JSON."""
+        return self.breakpoints.tolist(), self.values.tolist()
+
+
+def is_profile(value):
+    return isinstance(value, (tuple, list, PiecewiseConstant))
+
+
+def as_piecewise(profile):
+    return profile if isinstance(profile, PiecewiseConstant) else PiecewiseConstant(*profile)
+
+
+def cumulative_rate(profile, t):
+    """Λ(t), the integral of the profile from 0 to t."""
+    return as_piecewise(profile).integral(t)
+
+
+class PoissonArrivals:
+    """Arrival times of a Poisson process with rate profile λ(t), drawn in blocks."""
+
+    def __init__(self, rng, profile, block_size=4096):
+        self.rng = rng
+        self.profile = as_piecewise(profile)
+        self.block_size = block_size
+        self.last_cumulative = 0.0  # Λ at the most recent generated arrival
+        self.block = []
+        self.position = 0
+
+    def next(self):
+        if self.position == len(self.block):
+            self._refill()
+        arrival_time = self.block[self.position]
+        self.position += 1
+        return arrival_time
+
+    def state(self):
+        """Generator state, Λ reached and the unused rest of the block (see VariateSource.state)."""
+        return {
+            'rng': generator_state(self.rng),
+            'last_cumulative': self.last_cumulative,
+            'block': np.array(self.block[self.position:]),
+        }
+
+    def load_state(self, state):
+        set_generator_state(self.rng, state['rng'])
+        self.last_cumulative = float(state['last_cumulative'])
+        self.block = np.asarray(state['block']).tolist()
+        self.position = 0
+
+    def _refill(self):
+        self.block = self.draw_block().tolist()
+        self.position = 0
+
+    def draw_block(self):
+        unit_points = self.last_cumulative + np.cumsum(self.rng.standard_exponential(self.block_size))
+        self.last_cumulative = float(unit_points[-1])
+        return self.profile.inverse_integral(unit_points)
+
+
+def expected_arrivals(profile, simulation_time):
+    return float(cumulative_rate(profile, simulation_time))
+
+
+def staffing_changes(profile):
+    """(time, level) pairs for every change after t = 0, in order."""
+    profile = as_piecewise(profile)
+    return [(float(t), int(level)) for t, level in zip(profile.breakpoints[1:], profile.values[1:])]
+
+
+def peak(profile):
+    return int(as_piecewise(profile).values.max()) if is_profile(profile) else profile
+
+
+def initial(profile):
+    return int(as_piecewise(profile).values[0]) if is_profile(profile) else profile
+
@@ -0,0 +1,34 @@
+import shutil
+
+from file_cache import FileCache, content_key
+
+# Content-addressed store for rendered files: background images and video
+# segments.
+#
+# A rendered file is a pure function of what it shows, so it is stored
+# under the hash of a canonical JSON description of exactly that (scene
+# parameters, seed, the events drawn, quality and a digest of the drawing
+# code). Re-rendering after a change then only renders the pieces whose
+# description changed and copies the rest from the cache. Size bounds and
+# least-recently-used eviction come from file_cache.FileCache.
+
+
+class RenderCache(FileCache):
+    """Rendered files in `directory`, named by content key, at most max_bytes in total."""
+
+    def __init__(self, directory='.render_cache', max_bytes=2 * 1024 ** 3):
+        super().__init__(directory, max_bytes)
+
+    @staticmethod
+    def key(description):
+        return content_key(description)
+
+    def get(self, key, suffix):
+        """Path of the cached file, or None."""
+        return self._lookup(key, suffix)
+
+    def put(self, key, suffix, source):
+        """Copy the rendered file `source` into the cache and return its cached path."""
+        with self._writing(key, suffix) as f, open(source, 'rb') as rendered:
+            shutil.copyfileobj(rendered, f)
+        return self._path(key, suffix)
@@ -0,0 +1,136 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.special import stdtrit
+
+from queue_engine import simulate_mm1, simulate_mmc
+
+# Monte Carlo replications of the M/M/1 and M/M/c models.
+#
+# A single seeded run gives one noisy sample path; here independent
+# replications are spread over a process pool and summarised with
+# Student-t confidence intervals. Every replication gets its own child of
+# one SeedSequence, so streams never overlap and results do not depend on
+# how replications are split between workers.
+
+METRICS = ('average_waiting_time', 'average_queue_delay', 'average_queue_length', 'utilization', 'waiting_time_p95')
+
+# Input statistics with exactly known means, usable as control variates
+CONTROLS = ('arrival_count', 'average_service_time')
+
+
+def replication_metrics(arrival_rate, service_rate, c, simulation_time, seed, antithetic=None):
+    # Replications only need summaries, so customers are streamed rather than kept
+    if c == 1:
+        result = simulate_mm1(arrival_rate, service_rate, simulation_time, seed, keep_customers=False,
+                              antithetic=antithetic)
+    else:
+        result = simulate_mmc(arrival_rate, service_rate, c, simulation_time, seed, keep_customers=False,
+                              antithetic=antithetic)
+    customer_count = result.customer_count
+    return {
+        'average_waiting_time': result.average_waiting_time,
+        'average_queue_delay': result.average_queue_delay,
+        'average_queue_length': result.average_queue_length,
+        'utilization': float(result.utilization.mean()),
+        'waiting_time_p95': result.statistics.waiting_time_sketch.quantile(0.95) if customer_count else 0.0,
+        'arrival_count': customer_count,
+        'average_service_time': float(result.busy_time.sum()) / customer_count if customer_count else 0.0,
+    }
+
+
+def _run_chunk(args):
+    # Runs a slice of replications inside one worker process
+    arrival_rate, service_rate, c, simulation_time, runs = args
+    return [replication_metrics(arrival_rate, service_rate, c, simulation_time, seed, antithetic)
+            for seed, antithetic in runs]
+
+
+def confidence_interval(values, confidence=0.95):
+    """Return (mean, half_width) of a Student-t interval for the mean."""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mean = float(values.mean())
+    if n < 2:
+        return mean, math.inf
+    t_quantile = stdtrit(n - 1, 0.5 + confidence / 2)
+    return mean, float(t_quantile * values.std(ddof=1) / math.sqrt(n))
+
+
+def summarize(samples, confidence=0.95):
+    summary = {}
+    for metric, values in samples.items():
+        mean, half_width = confidence_interval(values, confidence)
+        summary[metric] = {
+            'mean': mean,
+            'half_width': half_width,
+            'low': mean - half_width,
+            'high': mean + half_width,
+        }
+    return summary
+
+
+def run_batch(arrival_rate, service_rate, c, simulation_time, runs, processes=None):
+    """Metrics of each (seed, antithetic) run, in order, spread over a process pool."""
+    processes = processes or os.cpu_count() or 1
+    processes = min(processes, len(runs))
+
+    if processes <= 1:
+        return _run_chunk((arrival_rate, service_rate, c, simulation_time, runs))
+
+    # A few chunks per worker keeps the pool busy without paying
+    # inter-process overhead on every replication
+    chunk_count = processes * 4
+    chunks = [runs[i::chunk_count] for i in range(chunk_count) if runs[i::chunk_count]]
+    tasks = [(arrival_rate, service_rate, c, simulation_time, chunk) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        chunk_rows = list(executor.map(_run_chunk, tasks))
+
+    # Put rows back in replication order
+    rows = [None] * len(runs)
+    for i, chunk in enumerate(chunk_rows):
+        rows[i::chunk_count] = chunk
+    return rows
+
+
+def run_replications(arrival_rate, service_rate, c=1, simulation_time=20, replications=100,
+                     seed=None, processes=None, confidence=0.95, antithetic=False):
+    """Run independent replications in parallel and aggregate them.
+
+    Returns a dict with the per-replication samples of every metric (and of
+    the CONTROLS) and a summary of means and confidence intervals.
+    processes=1 runs in-process.
+
+    Calls with the same seed reuse the same streams, so comparing two
+    configurations on one seed uses common random numbers. With
+    antithetic=True the replications run in pairs on U and 1 - U and every
+    sample is the mean of one pair, so replications must be even.
+    """
+    if antithetic:
+        if replications % 2:
+            raise ValueError(f"antithetic replications run in pairs; got an odd count ({replications})")
+        pair_seeds = np.random.SeedSequence(seed).spawn(replications // 2)
+        runs = [(pair_seed, twin) for pair_seed in pair_seeds for twin in (False, True)]
+    else:
+        runs = [(run_seed, None) for run_seed in np.random.SeedSequence(seed).spawn(replications)]
+    rows = run_batch(arrival_rate, service_rate, c, simulation_time, runs, processes)
+
+    samples = {metric: np.array([row[metric] for row in rows], dtype=np.float64) for metric in METRICS + CONTROLS}
+    if antithetic:
+        samples = {metric: values.reshape(-1, 2).mean(axis=1) for metric, values in samples.items()}
+    return {
+        'replications': len(runs),
+        'confidence': confidence,
+        'samples': samples,
+        'summary': summarize(samples, confidence),
+    }
+
+
+if __name__ == '__main__':
+    # Same parameters as MMCQueueScene, but with 200 replications instead of one seed
+    results = run_replications(arrival_rate=2, service_rate=1.5, c=4, simulation_time=20,
+                               replications=200, seed=42)
+    for metric, row in results['summary'].items():
+        print(f"{metric}: {row['mean']:.4f} ± {row['half_width']:.4f}")
@@ -0,0 +1,180 @@
+import math
+from array import array
+
+import numpy as np
+
+from queue_engine import MMcSimulation, simulate_mm1_vectorized
+from replications import confidence_interval, run_batch
+
+# Sequential stopping: simulate until an estimate is precise enough.
+#
+# replicate_until keeps adding independent replications until the
+# confidence-interval half-width of a metric drops below a tolerance,
+# sizing each new batch from the variance seen so far. Replications start
+# empty and end at the horizon, so they estimate finite-horizon metrics.
+#
+# batch_means_until estimates steady-state metrics from one long run
+# instead: the warm-up transient is detected with MSER-5 and deleted, the
+# rest is cut into batches whose means are treated as roughly independent,
+# and the horizon doubles until the tolerance is met. Only the one
+# per-customer series the metric needs is kept. An M/M/c run is paused at
+# each horizon and continued to the next; M/M/1 reruns the chunked Lindley
+# recursion instead, which is still far cheaper than the event loop and,
+# with the same seed, extends the shorter run exactly.
+
+# Per-customer series and statistic behind each metric of a long run
+SERIES = {
+    'average_waiting_time': ('waiting_times', None),
+    'average_queue_delay': ('queue_delays', None),
+    'waiting_time_p95': ('waiting_times', 0.95),
+}
+
+
+class _SeriesRecorder:
+    # Collector for the engine's statistics= hook that keeps one series of
+    # waiting times or queue delays, in order of departure, and nothing else
+
+    def __init__(self, series):
+        self.queue_delays = series == 'queue_delays'
+        self.values = array('d')
+
+    def record_customer(self, arrival_time, service_start_time, departure_time):
+        end_time = service_start_time if self.queue_delays else departure_time
+        self.values.append(end_time - arrival_time)
+
+    def record_customers(self, arrival_times, service_start_times, departure_times):
+        end_times = service_start_times if self.queue_delays else departure_times
+        self.values.frombytes((end_times - arrival_times).tobytes())
+
+    def record_queue(self, length, duration):
+        pass
+
+    def record_queue_batch(self, lengths, durations):
+        pass
+
+    def flush(self):
+        pass
+
+
+def mser(values, batch_size=5):
+    """MSER truncation point: how many leading observations to delete.
+
+    Observations are averaged in batches of batch_size (MSER-5 by default)
+    and the deletion d minimises the squared standard error of the batches
+    after d, searched over the first half of the run.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values) // batch_size
+    if n < 4:
+        return 0
+    batches = values[:n * batch_size].reshape(n, batch_size).mean(axis=1)
+
+    # Sums over batches[d:] for every d at once
+    remaining = np.arange(n, 0, -1)
+    sums = np.cumsum(batches[::-1])[::-1]
+    squares = np.cumsum(batches[::-1] ** 2)[::-1]
+    means = sums / remaining
+    statistic = (squares - remaining * means ** 2) / remaining ** 2
+    return int(np.argmin(statistic[:n // 2])) * batch_size
+
+
+def batch_means(values, batches=20, quantile=None, confidence=0.95):
+    """(estimate, half_width) from non-overlapping batches of a correlated series.
+
+    Each batch contributes its mean, or its quantile when one is given.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    size = len(values) // batches
+    if size == 0:
+        return confidence_interval(values, confidence) if quantile is None else (math.nan, math.inf)
+    grouped = values[:size * batches].reshape(batches, size)
+    statistics = grouped.mean(axis=1) if quantile is None else np.quantile(grouped, quantile, axis=1)
+    return confidence_interval(statistics, confidence)
+
+
+def _target(tolerance, mean, relative):
+    return tolerance * abs(mean) if relative else tolerance
+
+
+def replicate_until(arrival_rate, service_rate, c=1, simulation_time=20, tolerance=0.05, relative=False,
+                    metric='average_waiting_time', seed=None, initial_replications=10,
+                    max_replications=10_000, processes=None, confidence=0.95):
+    """Add replications until the half-width of `metric` is at most the tolerance.
+
+    relative=True reads the tolerance as a fraction of the mean. The first n
+    replications are the same ones run_replications(seed=seed) would use.
+    """
+    root = np.random.SeedSequence(seed)
+    values = []
+    batch = initial_replications
+    while True:
+        runs = [(run_seed, None) for run_seed in root.spawn(batch)]
+        rows = run_batch(arrival_rate, service_rate, c, simulation_time, runs, processes)
+        values.extend(row[metric] for row in rows)
+        mean, half_width = confidence_interval(values, confidence)
+        target = _target(tolerance, mean, relative)
+
+        converged = half_width <= target
+        if converged or len(values) >= max_replications:
+            break
+        # The half-width shrinks like 1 / sqrt(n); aim for the target directly
+        needed = math.ceil(len(values) * (half_width / target) ** 2) if target > 0 else 2 * len(values)
+        batch = min(max(needed - len(values), 1), max_replications - len(values))
+
+    return {
+        'metric': metric,
+        'mean': mean,
+        'half_width': half_width,
+        'replications': len(values),
+        'converged': converged,
+    }
+
+
+def batch_means_until(arrival_rate, service_rate, c=1, tolerance=0.05, relative=False,
+                      metric='average_waiting_time', seed=None, simulation_time=1000, batches=20,
+                      max_simulation_time=1e7, confidence=0.95):
+    """Lengthen one run until the batch-means half-width meets the tolerance."""
+    series, quantile = SERIES[metric]
+    recorder = _SeriesRecorder(series)
+    if c != 1:
+        simulation = MMcSimulation(arrival_rate, service_rate, c, seed, keep_customers=False, statistics=recorder)
+    while True:
+        if c == 1:
+            recorder = _SeriesRecorder(series)
+            simulate_mm1_vectorized(arrival_rate, service_rate, simulation_time, seed, keep_customers=False,
+                                    statistics=recorder)
+        else:
+            # Pause at the horizon, so the next pass continues this run instead of starting over
+            simulation.run(simulation_time, drain=False)
+        values = np.array(recorder.values)
+        truncation = mser(values)
+        mean, half_width = batch_means(values[truncation:], batches, quantile, confidence)
+        target = _target(tolerance, mean, relative)
+
+        converged = half_width <= target
+        if converged or simulation_time >= max_simulation_time:
+            break
+        simulation_time = min(2 * simulation_time, max_simulation_time)
+
+    return {
+        'metric': metric,
+        'mean': mean,
+        'half_width': half_width,
+        'simulation_time': simulation_time,
+        'truncation': truncation,
+        'customers': len(values) - truncation,
+        'converged': converged,
+    }
+
+
+if __name__ == '__main__':
+    # Same parameters as MMCQueueScene: 5% relative precision instead of a hand-picked run
+    for metric in ('average_waiting_time', 'waiting_time_p95'):
+        finite = replicate_until(arrival_rate=2, service_rate=1.5, c=4, simulation_time=20, tolerance=0.05,
+                                 relative=True, metric=metric, seed=42)
+        print(f"{metric} over 20 time units: {finite['mean']:.4f} ± {finite['half_width']:.4f} "
+              f"({finite['replications']} replications)")
+        steady = batch_means_until(arrival_rate=2, service_rate=1.5, c=4, tolerance=0.01, relative=True,
+                                   metric=metric, seed=42)
+        print(f"{metric} in steady state: {steady['mean']:.4f} ± {steady['half_width']:.4f} "
+              f"(T = {steady['simulation_time']:g}, {steady['truncation']} warm-up customers deleted)")
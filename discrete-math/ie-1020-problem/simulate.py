@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import sys
+
+# Command-line entry point for the queue models, without manim.
+#
+#   python simulate.py mmc --arrival-rate 2 --service-rate 1.5 --servers 4 --time 20 --seed 42
+#   python simulate.py mm1 --replications 200 --format csv
+#   python simulate.py multi --arrival-rates 0.5 0.7 0.6 --service-rates 1
+#   python simulate.py mmc --config staffing.json --render --quality h
+#   python simulate.py mmc --validate --time 10000
+#
+# Only the numeric modules are imported up front. manim (and the scene
+# modules that need it) is imported inside render(), so batch jobs start
+# quickly and run on machines without the LaTeX/Cairo stack. A JSON (or,
+# on Python 3.11+, TOML) config file supplies defaults for any option;
+# flags given on the command line win.
+
+QUALITIES = {
+    'l': 'low_quality',
+    'm': 'medium_quality',
+    'h': 'high_quality',
+    'p': 'production_quality',
+    'k': 'fourk_quality',
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='simulate', description="Simulate M/M/1, M/M/c or parallel M/M/1 queues.")
+    subparsers = parser.add_subparsers(dest='model', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', help="JSON or TOML file with option defaults (keys as in --help, with _)")
+    common.add_argument('--time', dest='simulation_time', type=float, default=20, help="simulation horizon")
+    common.add_argument('--seed', type=int, default=None)
+    common.add_argument('--format', choices=('json', 'csv'), default='json')
+    common.add_argument('--output', '-o', default=None, help="write metrics here instead of stdout")
+    common.add_argument('--render', action='store_true', help="also render the animation with manim")
+    common.add_argument('--quality', choices=tuple(QUALITIES), default='l', help="manim render quality")
+
+    for model, servers in (('mm1', False), ('mmc', True)):
+        subparser = subparsers.add_parser(model, parents=[common], help=f"single {model.upper()} queue")
+        subparser.add_argument('--arrival-rate', type=float, default=2)
+        subparser.add_argument('--service-rate', type=float, default=1.5)
+        if servers:
+            subparser.add_argument('--servers', '-c', dest='c', type=int, default=4)
+        subparser.add_argument('--replications', type=int, default=1,
+                               help="independent replications; more than one reports confidence intervals")
+        subparser.add_argument('--analytic', action='store_true',
+                               help="report the closed-form steady-state metrics instead of simulating")
+        subparser.add_argument('--validate', action='store_true',
+                               help="compare a single run with the steady-state formulas")
+
+    multi = subparsers.add_parser('multi', parents=[common], help="independent M/M/1 stations side by side")
+    multi.add_argument('--arrival-rates', type=float, nargs='+', default=[0.5, 0.7, 0.6])
+    multi.add_argument('--service-rates', type=float, nargs='+', default=[1.0],
+                       help="one rate per station, or a single rate for all of them")
+    return parser, subparsers.choices
+
+
+def parse_args(argv=None):
+    parser, model_parsers = build_parser()
+    args = parser.parse_args(argv)
+    if args.config:
+        config = load_config(args.config)
+        subparser = model_parsers[args.model]
+        known = {action.dest for action in subparser._actions}
+        unknown = sorted(set(config) - known)
+        if unknown:
+            parser.error(f"unknown option(s) in {args.config}: {', '.join(unknown)}")
+        # Config values become defaults, so explicit flags still override them
+        subparser.set_defaults(**config)
+        args = parser.parse_args(argv)
+    if args.model == 'mm1':
+        args.c = 1
+    return args
+
+
+def load_config(path):
+    with open(path, 'rb') as f:
+        if str(path).endswith('.toml'):
+            import tomllib
+            return tomllib.load(f)
+        return json.load(f)
+
+
+def parameters(args):
+    if args.model == 'multi':
+        names = ('arrival_rates', 'service_rates', 'simulation_time', 'seed')
+    else:
+        names = ('arrival_rate', 'service_rate', 'c', 'simulation_time', 'seed', 'replications')
+    return {name: getattr(args, name) for name in names}
+
+
+def run(args):
+    """Metrics rows for the parsed arguments."""
+    if args.model == 'multi':
+        from multi_queue import simulate_independent_mm1
+
+        result = simulate_independent_mm1(args.arrival_rates, args.service_rates, args.simulation_time, args.seed)
+        service_rates = args.service_rates * len(args.arrival_rates) if len(args.service_rates) == 1 \
+            else args.service_rates
+        return [
+            {
+                'station': station + 1,
+                'arrival_rate': arrival_rate,
+                'service_rate': service_rate,
+                'customers': int(result.counts[station]),
+                'average_waiting_time': float(result.average_waiting_time[station]),
+                'average_queue_length': float(result.average_queue_length[station]),
+                'utilization': float(result.utilization[station]),
+            }
+            for station, (arrival_rate, service_rate) in enumerate(zip(args.arrival_rates, service_rates))
+        ]
+
+    if args.analytic:
+        from queue_engine import steady_state_metrics
+
+        metrics = steady_state_metrics(args.arrival_rate, args.service_rate, args.c)
+        return [{'metric': metric, 'value': float(value)} for metric, value in metrics.items()]
+
+    if args.validate:
+        from queue_engine import simulate_mmc, validate
+
+        result = simulate_mmc(args.arrival_rate, args.service_rate, args.c, args.simulation_time, args.seed,
+                              keep_customers=False)
+        report = validate(result, args.arrival_rate, args.service_rate)
+        return [{'metric': metric, 'value': value, 'expected': float(expected), 'relative_error': float(error)}
+                for metric, (value, expected, error) in report.items()]
+
+    from replications import replication_metrics, run_replications
+
+    if args.replications == 1:
+        metrics = replication_metrics(args.arrival_rate, args.service_rate, args.c, args.simulation_time, args.seed)
+        return [{'metric': metric, 'value': value} for metric, value in metrics.items()]
+
+    results = run_replications(args.arrival_rate, args.service_rate, args.c, args.simulation_time,
+                               args.replications, args.seed)
+    return [{'metric': metric, **interval} for metric, interval in results['summary'].items()]
+
+
+def write(rows, args, stream):
+    if args.format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=list(rows[0]) if rows else [], lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump({'model': args.model, 'parameters': parameters(args), 'results': rows}, stream, indent=2)
+        stream.write('\n')
+
+
+def render(args):
+    # Imported here so that plain simulations never load manim
+    from manim import BLUE, GREEN, ORANGE, PURPLE, RED, YELLOW, tempconfig
+
+    if args.model == 'multi':
+        from MultipleMM1Queues import MultipleMM1Queues
+
+        colors = [BLUE, GREEN, RED, YELLOW, PURPLE, ORANGE]
+        service_rates = args.service_rates * len(args.arrival_rates) if len(args.service_rates) == 1 \
+            else args.service_rates
+        queues = [
+            {'name': f'Queue {i + 1}', 'arrival_rate': arrival_rate, 'service_rate': service_rate,
+             'color': colors[i % len(colors)]}
+            for i, (arrival_rate, service_rate) in enumerate(zip(args.arrival_rates, service_rates))
+        ]
+        scene_class = type('MultipleMM1Queues', (MultipleMM1Queues,), {
+            'queues': queues, 'max_time': args.simulation_time, 'seed': args.seed,
+        })
+    else:
+        from MMcQueue import MMCQueueScene
+
+        scene_class = type('MMCQueueScene', (MMCQueueScene,), {
+            'arrival_rate': args.arrival_rate, 'service_rate': args.service_rate, 'c': args.c,
+            'simulation_time': args.simulation_time, 'seed': args.seed,
+        })
+
+    with tempconfig({'quality': QUALITIES[args.quality]}):
+        scene_class().render()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.model == 'multi' and len(args.service_rates) not in (1, len(args.arrival_rates)):
+        sys.exit("simulate: give one service rate or one per arrival rate")
+    if args.model != 'multi' and args.validate and args.replications != 1:
+        sys.exit("simulate: --validate compares a single run; drop --replications")
+
+    rows = run(args)
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write(rows, args, f)
+    else:
+        write(rows, args, sys.stdout)
+
+    if args.render:
+        render(args)
+
+
+if __name__ == '__main__':
+    main()
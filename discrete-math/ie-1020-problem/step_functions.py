@@ -1,5 +1,7 @@
 from manim import *
 
+from rates import ONE_PULSE, TWO_PULSES, PiecewiseConstant
+
 class StepFunctionsScene(Scene):
     def construct(self):
         # -----------------------------
@@ -30,59 +32,27 @@ class StepFunctionsScene(Scene):
         # -----------------------------
         # 2. Define the Step Functions
         # -----------------------------
+        # The same λ(t) profiles the simulation engine accepts as arrival_rate
         # Step Function with One Pulse
-        def one_pulse(t):
-            return 2 if  2 <= t < 4 else 0.5
+        one_pulse = PiecewiseConstant(*ONE_PULSE)
 
         # Step Function with Two Pulses
-        def two_pulses(t):
-            if (2 <= t < 4) or (5 <= t < 7):
-                return 1
-            else:
-                return 0.5
+        two_pulses = PiecewiseConstant(*TWO_PULSES)
 
         # -----------------------------
         # 3. Plot the Step Functions with Vertical Lines
         # -----------------------------
-        # Helper function to create step functions with vertical lines
-        def create_step_function(axes, func, discontinuities, color):
-            step_graph = VGroup()
-            prev_t = axes.x_range[0]
-            prev_val = func(prev_t)
-
-            for t in discontinuities + [axes.x_range[1]]:
-                # Horizontal line from prev_t to t at height prev_val
-                horizontal = Line(
-                    start=axes.c2p(prev_t, prev_val),
-                    end=axes.c2p(t, prev_val),
-                    color=color,
-                    stroke_width=2
-                )
-                step_graph.add(horizontal)
-
-                if t in discontinuities:
-                    # Determine the new value after the discontinuity
-                    new_val = func(t)
-                    # Vertical line from prev_val to new_val at t
-                    vertical = Line(
-                        start=axes.c2p(t, prev_val),
-                        end=axes.c2p(t, new_val),
-                        color=color,
-                        stroke_width=2
-                    )
-                    step_graph.add(vertical)
-                    # Update previous value and time
-                    prev_val = new_val
-                    prev_t = t
-
+        # Helper function to draw a step function, jumps included, as one
+        # polyline: a single VMobject however many steps the profile has
+        def create_step_function(axes, profile, color):
+            corners = profile.corners(axes.x_range[0], axes.x_range[1])
+            step_graph = VMobject(stroke_color=color, stroke_width=2)
+            step_graph.set_points_as_corners([axes.c2p(t, value) for t, value in corners])
             return step_graph
 
         # Create step functions
-        discontinuities_one = [2, 4]
-        discontinuities_two = [2, 4, 5, 7]
-
-        step_one_pulse = create_step_function(axes, one_pulse, discontinuities_one, BLUE)
-        step_two_pulses = create_step_function(axes, two_pulses, discontinuities_two, RED)
+        step_one_pulse = create_step_function(axes, one_pulse, BLUE)
+        step_two_pulses = create_step_function(axes, two_pulses, RED)
 
         # -----------------------------
         # 4. Show Scene Elements
@@ -0,0 +1,271 @@
+import math
+
+import numpy as np
+
+# Constant-memory statistics for long simulation runs.
+#
+# Instead of keeping every customer's waiting time, the collectors below
+# fold observations into a fixed amount of state as they arrive:
+#   - RunningMoments: count, mean and variance (Welford / Chan et al.)
+#   - QuantileSketch: log-spaced buckets, so any quantile is known to
+#     within a fixed relative error (the DDSketch idea)
+#   - TimeWeightedHistogram: time spent at each queue length
+# Every collector takes single values or whole NumPy batches and can be
+# merged with another one, e.g. across replications or workers, and its
+# state can be saved and loaded as plain data, e.g. in a checkpoint.
+
+
+class _Collector:
+    def state(self):
+        """All attributes as numbers and NumPy arrays."""
+        return dict(vars(self))
+
+    def load_state(self, state):
+        self.__dict__.update({name: np.array(value) if isinstance(value, np.ndarray) else value
+                              for name, value in state.items()})
+
+
+class RunningMoments(_Collector):
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.minimum:
+            self.minimum = x
+        if x > self.maximum:
+            self.maximum = x
+
+    def update_batch(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        batch = RunningMoments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        batch.minimum = float(values.min())
+        batch.maximum = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch(_Collector):
+    """Quantiles of positive values within `relative_accuracy`, in fixed memory.
+
+    Values below min_value (in particular zero queue delays) are counted
+    exactly as zeros; values above max_value land in the top bucket.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9, max_value=1e9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = math.floor(math.log(min_value) / self.log_gamma)
+        bucket_count = math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1
+        self.counts = np.zeros(bucket_count, dtype=np.int64)
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        return self.zero_count + int(self.counts.sum())
+
+    def _bucket(self, x):
+        index = math.ceil(math.log(x) / self.log_gamma) - self.offset
+        return min(max(index, 0), len(self.counts) - 1)
+
+    def update(self, x):
+        if x < self.min_value:
+            self.zero_count += 1
+        else:
+            self.counts[self._bucket(x)] += 1
+
+    def update_batch(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        positive = values[values >= self.min_value]
+        self.zero_count += len(values) - len(positive)
+        index = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64) - self.offset
+        index = np.clip(index, 0, len(self.counts) - 1)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.zero_count += other.zero_count
+
+    def quantile(self, q):
+        count = self.count
+        if count == 0:
+            return math.nan
+        rank = q * (count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        bucket = int(np.searchsorted(cumulative, rank - self.zero_count, side='right'))
+        bucket = min(bucket, len(self.counts) - 1)
+        # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+        return 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
+
+
+class TimeWeightedHistogram(_Collector):
+    """Time spent at each level of a step function such as the queue length.
+
+    Levels above max_level share one overflow bin, whose mean level is
+    still tracked exactly. update is called once per simulation event, so
+    the time per level is a plain list: adding to a list item costs a
+    fraction of adding to a NumPy array element.
+    """
+
+    def __init__(self, max_level=1024):
+        self.max_level = max_level
+        self.time_at = [0.0] * (max_level + 1)
+        self.total_time = 0.0
+        self.area = 0.0  # Integral of the level over time
+
+    def update(self, level, duration):
+        self.time_at[level if level < self.max_level else self.max_level] += duration
+        self.total_time += duration
+        self.area += level * duration
+
+    def update_batch(self, levels, durations):
+        levels = np.asarray(levels, dtype=np.int64)
+        durations = np.asarray(durations, dtype=np.float64)
+        counts = np.bincount(np.minimum(levels, self.max_level), weights=durations, minlength=self.max_level + 1)
+        self.time_at = (np.asarray(self.time_at) + counts).tolist()
+        self.total_time += float(durations.sum())
+        self.area += float(np.dot(levels, durations))
+
+    def merge(self, other):
+        self.time_at = (np.asarray(self.time_at) + np.asarray(other.time_at)).tolist()
+        self.total_time += other.total_time
+        self.area += other.area
+
+    def mean(self):
+        """Time average of the level over all the time recorded."""
+        return self.area / self.total_time if self.total_time else 0.0
+
+    def distribution(self):
+        time_at = np.asarray(self.time_at)
+        return time_at / self.total_time if self.total_time else time_at
+
+    def quantile(self, q):
+        if not self.total_time:
+            return 0
+        cumulative = np.cumsum(self.time_at) / self.total_time
+        return int(min(np.searchsorted(cumulative, q, side='left'), self.max_level))
+
+
+class StreamingStatistics:
+    """Per-customer and queue-length statistics of one run in O(1) memory.
+
+    Single customers are buffered and folded in as NumPy batches, and queue
+    lengths go straight into their histogram, which keeps the per-event
+    cost in the simulation loop low.
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+    BUFFER_SIZE = 4096
+
+    def __init__(self, relative_accuracy=0.01, max_queue_length=1024):
+        self.waiting_time = RunningMoments()  # Time in system, as the scenes report it
+        self.waiting_time_sketch = QuantileSketch(relative_accuracy)
+        self.queue_delay = RunningMoments()  # Time in the waiting line only
+        self.queue_delay_sketch = QuantileSketch(relative_accuracy)
+        self.queue_length = TimeWeightedHistogram(max_queue_length)
+
+        self._customer_buffer = []  # Flat (arrival, service start, departure) triples
+
+    def record_customer(self, arrival_time, service_start_time, departure_time):
+        buffer = self._customer_buffer
+        buffer += (arrival_time, service_start_time, departure_time)
+        if len(buffer) >= 3 * self.BUFFER_SIZE:
+            self._flush_customers()
+
+    def record_customers(self, arrival_times, service_start_times, departure_times):
+        waiting_times = departure_times - arrival_times
+        queue_delays = service_start_times - arrival_times
+        self.waiting_time.update_batch(waiting_times)
+        self.waiting_time_sketch.update_batch(waiting_times)
+        self.queue_delay.update_batch(queue_delays)
+        self.queue_delay_sketch.update_batch(queue_delays)
+
+    def record_queue(self, length, duration):
+        self.queue_length.update(length, duration)
+
+    def record_queue_batch(self, lengths, durations):
+        self.queue_length.update_batch(lengths, durations)
+
+    def flush(self):
+        self._flush_customers()
+
+    def _flush_customers(self):
+        if self._customer_buffer:
+            arrival_times, service_start_times, departure_times = np.array(self._customer_buffer).reshape(-1, 3).T
+            self._customer_buffer = []
+            self.record_customers(arrival_times, service_start_times, departure_times)
+
+    def merge(self, other):
+        self.flush()
+        other.flush()
+        self.waiting_time.merge(other.waiting_time)
+        self.waiting_time_sketch.merge(other.waiting_time_sketch)
+        self.queue_delay.merge(other.queue_delay)
+        self.queue_delay_sketch.merge(other.queue_delay_sketch)
+        self.queue_length.merge(other.queue_length)
+
+    def state(self):
+        self.flush()
+        return {name: collector.state() for name, collector in vars(self).items() if not name.startswith('_')}
+
+    def load_state(self, state):
+        for name, collector_state in state.items():
+            getattr(self, name).load_state(collector_state)
+
+    def summary(self):
+        """Means, spreads and quantiles of the run.
+
+        The queue_length_* entries are over all the time recorded, drain
+        included, so queue_length_time_average is the integral over the run
+        divided by its length. SimulationResult.average_queue_length divides
+        the same integral by the horizon instead.
+        """
+        self.flush()
+        summary = {
+            'customers': self.waiting_time.count,
+            'waiting_time_mean': self.waiting_time.mean,
+            'waiting_time_std': self.waiting_time.std,
+            'queue_delay_mean': self.queue_delay.mean,
+            'queue_delay_std': self.queue_delay.std,
+            'queue_length_time_average': self.queue_length.mean(),
+        }
+        for q in self.QUANTILES:
+            label = f'p{round(q * 100)}'
+            summary[f'waiting_time_{label}'] = self.waiting_time_sketch.quantile(q)
+            summary[f'queue_delay_{label}'] = self.queue_delay_sketch.quantile(q)
+            summary[f'queue_length_{label}'] = self.queue_length.quantile(q)
+        return summary
@@ -0,0 +1,97 @@
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from file_cache import FileCache, content_key
+from queue_engine import ENGINE_VERSION
+from replications import replication_metrics
+
+# Parameter sweeps over (λ, μ, c, horizon, seed) grids with a result cache.
+#
+# Every grid cell is one seeded run, so its metrics are a pure function of
+# the cell and the engine version. They are stored on disk under a hash of
+# exactly that, which lets an extended grid reuse every cell computed
+# before and only run the new ones. The cache is bounded in size; the least
+# recently used entries are evicted first.
+
+PARAMETERS = ('arrival_rate', 'service_rate', 'c', 'simulation_time', 'seed')
+
+
+class ResultCache(FileCache):
+    """Cell metrics as small JSON files in `directory`, at most max_bytes in total."""
+
+    def __init__(self, directory='.sweep_cache', max_bytes=256 * 1024 ** 2):
+        super().__init__(directory, max_bytes)
+
+    @staticmethod
+    def key(cell):
+        return content_key({'cell': cell, 'engine_version': ENGINE_VERSION})
+
+    def get(self, cell):
+        path = self._lookup(self.key(cell), '.json')
+        if path is None:
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, cell, metrics):
+        with self._writing(self.key(cell), '.json', 'w') as f:
+            json.dump(metrics, f)
+
+
+def parameter_grid(arrival_rate, service_rate, c, simulation_time, seed):
+    """Every combination of the given values (scalars count as one value)."""
+    axes = [value if isinstance(value, (list, tuple, range)) else [value]
+            for value in (arrival_rate, service_rate, c, simulation_time, seed)]
+    return [
+        {'arrival_rate': float(lam), 'service_rate': float(mu), 'c': int(servers),
+         'simulation_time': float(horizon), 'seed': int(run_seed)}
+        for lam, mu, servers, horizon, run_seed in itertools.product(*axes)
+    ]
+
+
+def _run_cell(cell):
+    return replication_metrics(**cell)
+
+
+def run_sweep(grid, cache=None, processes=None):
+    """Metrics for every cell of `grid`, computing only the cells not in the cache.
+
+    Returns one row per cell, in grid order, holding its parameters and
+    metrics.
+    """
+    cache = cache if cache is not None else ResultCache()
+    results = [cache.get(cell) for cell in grid]
+    missing = [i for i, metrics in enumerate(results) if metrics is None]
+
+    if missing:
+        processes = min(processes or os.cpu_count() or 1, len(missing))
+        cells = [grid[i] for i in missing]
+        if processes == 1:
+            computed = [_run_cell(cell) for cell in cells]
+        else:
+            # A few chunks per worker, as in run_replications
+            chunk_size = max(1, len(cells) // (processes * 4))
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                computed = list(executor.map(_run_cell, cells, chunksize=chunk_size))
+        for i, metrics in zip(missing, computed):
+            cache.put(grid[i], metrics)
+            results[i] = metrics
+        cache.evict()
+
+    return [{**cell, **metrics} for cell, metrics in zip(grid, results)]
+
+
+if __name__ == '__main__':
+    # Staffing study around MMCQueueScene: how many servers for growing demand?
+    cache = ResultCache()
+    for arrival_rates in ([1, 2, 3], [1, 2, 3, 4, 5]):
+        grid = parameter_grid(arrival_rates, 1.5, range(1, 7), 200, range(10))
+        start = time.perf_counter()
+        rows = run_sweep(grid, cache)
+        print(f"{len(rows)} cells in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from network import jackson_metrics, simulate_network, traffic_rates
+
+
+def test_feedback_routing_solves_traffic_equations():
+    # 1 -> 2 -> 3, and 3 sends 20% back to 1: λ = 1 / 0.8 at every station
+    routing = [[0, 1, 0], [0, 0, 1], [0.2, 0, 0]]
+    np.testing.assert_allclose(traffic_rates([1.0, 0.0, 0.0], routing), [1.25, 1.25, 1.25])
+
+
+@pytest.mark.parametrize('routing', [
+    np.full((4, 4), 0.25),  # Closed: every row sums to 1
+    [[0, 1, 0], [1, 0, 0], [0, 0, 0]],  # Stations 1 and 2 trap customers, station 3 does not
+])
+def test_trapping_routing_is_rejected(routing):
+    with pytest.raises(ValueError, match="traps customers"):
+        traffic_rates([1.0] * len(routing), routing)
+    with pytest.raises(ValueError, match="traps customers"):
+        jackson_metrics([1.0] * len(routing), routing, 2.0)
+    with pytest.raises(ValueError, match="traps customers"):
+        simulate_network([1.0] * len(routing), routing, 2.0, simulation_time=10, seed=1)
+
+
+def test_random_closed_routing_is_rejected():
+    rng = np.random.default_rng(0)
+    routing = rng.random((4, 4))
+    routing /= routing.sum(axis=1, keepdims=True)
+    with pytest.raises(ValueError, match="traps customers"):
+        traffic_rates(rng.random(4), routing)
@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+from scipy.special import stdtrit
+
+from analytic import mmc_metrics
+from replications import CONTROLS, confidence_interval, run_replications
+
+# Variance reduction for comparing and estimating queue configurations.
+#
+#   - Common random numbers: arrivals and services come from separate
+#     streams (queue_engine.make_streams), so two configurations run on the
+#     same seed see the same customers, and their difference is estimated
+#     from paired samples.
+#   - Antithetic variates: replications run in pairs on U and 1 - U
+#     (run_replications(antithetic=True)).
+#   - Control variates: the number of arrivals and the mean service time
+#     have exactly known expectations, λT and 1/μ. Regressing the output on
+#     their deviations removes the part of its noise they explain.
+#
+# The steady-state formulas are reported next to the estimates, but are not
+# used as controls: a finite run that starts empty does not have the
+# steady-state mean as its expectation.
+
+
+def control_means(arrival_rate, service_rate, simulation_time):
+    return {
+        'arrival_count': arrival_rate * simulation_time,
+        'average_service_time': 1 / service_rate,
+    }
+
+
+def control_variate_interval(values, controls, means, confidence=0.95):
+    """Control-variate estimate of the mean of `values`.
+
+    controls maps names to per-replication samples and means to their known
+    expectations. Returns (mean, half_width, coefficients); the interval
+    uses n - q - 1 degrees of freedom for q controls.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    names = list(controls)
+    deviations = np.column_stack([np.asarray(controls[name], dtype=np.float64) - means[name] for name in names])
+    n, q = deviations.shape
+    if n <= q + 1:
+        return float(values.mean()), math.inf, dict.fromkeys(names, 0.0)
+
+    # Least squares fit of values = mean + deviations @ beta; the intercept
+    # is the adjusted estimate because the deviations have mean zero
+    design = np.column_stack([np.ones(n), deviations])
+    coefficients, *_ = np.linalg.lstsq(design, values, rcond=None)
+    residuals = values - design @ coefficients
+    residual_variance = residuals @ residuals / (n - q - 1)
+    standard_error = math.sqrt(residual_variance * np.linalg.pinv(design.T @ design)[0, 0])
+    t_quantile = stdtrit(n - q - 1, 0.5 + confidence / 2)
+    return float(coefficients[0]), float(t_quantile * standard_error), dict(zip(names, coefficients[1:].tolist()))
+
+
+def estimate(arrival_rate, service_rate, c=1, simulation_time=20, replications=100, seed=None,
+             metric='average_waiting_time', antithetic=False, controls=False, processes=None, confidence=0.95):
+    """Estimate one metric with optional antithetic pairs and control variates."""
+    results = run_replications(arrival_rate, service_rate, c, simulation_time, replications, seed,
+                               processes, confidence, antithetic=antithetic)
+    samples = results['samples']
+    if controls:
+        mean, half_width, coefficients = control_variate_interval(
+            samples[metric], {name: samples[name] for name in CONTROLS},
+            control_means(arrival_rate, service_rate, simulation_time), confidence,
+        )
+    else:
+        mean, half_width = confidence_interval(samples[metric], confidence)
+        coefficients = {}
+
+    steady_state = mmc_metrics(arrival_rate, service_rate, c)
+    return {
+        'mean': mean,
+        'half_width': half_width,
+        'replications': results['replications'],
+        'coefficients': coefficients,
+        'steady_state': steady_state['W'] if metric == 'average_waiting_time' else None,
+    }
+
+
+def compare(arrival_rate, service_rate, c_values=(3, 4), simulation_time=20, replications=100, seed=None,
+            metric='average_waiting_time', common_random_numbers=True, processes=None, confidence=0.95):
+    """Estimate metric(c_values[1]) - metric(c_values[0]).
+
+    With common_random_numbers both configurations run on the same seeds and
+    the interval comes from the paired differences; otherwise they use
+    independent seeds and a Welch interval.
+    """
+    if common_random_numbers:
+        seeds = [seed] * 2
+    else:
+        seeds = np.random.SeedSequence(seed).generate_state(2).tolist()
+    samples = [
+        run_replications(arrival_rate, service_rate, c, simulation_time, replications, config_seed,
+                         processes, confidence)['samples'][metric]
+        for c, config_seed in zip(c_values, seeds)
+    ]
+    estimates = {c: confidence_interval(values, confidence) for c, values in zip(c_values, samples)}
+
+    if common_random_numbers:
+        mean, half_width = confidence_interval(samples[1] - samples[0], confidence)
+    else:
+        variances = [values.var(ddof=1) / len(values) for values in samples]
+        standard_error = math.sqrt(sum(variances))
+        dof = sum(variances) ** 2 / sum(v ** 2 / (len(values) - 1) for v, values in zip(variances, samples))
+        mean = float(samples[1].mean() - samples[0].mean())
+        half_width = float(stdtrit(dof, 0.5 + confidence / 2) * standard_error)
+
+    return {
+        'estimates': estimates,
+        'difference': {'mean': mean, 'half_width': half_width},
+        'common_random_numbers': common_random_numbers,
+    }
+
+
+if __name__ == '__main__':
+    # Is a fourth server worth it? Same parameters as MMCQueueScene
+    for crn in (False, True):
+        result = compare(arrival_rate=2, service_rate=1.5, c_values=(3, 4), simulation_time=20,
+                         replications=200, seed=42, common_random_numbers=crn)
+        difference = result['difference']
+        print(f"W(c=4) - W(c=3), CRN={crn}: {difference['mean']:.4f} ± {difference['half_width']:.4f}")
+
+    for antithetic, controls in ((False, False), (True, False), (False, True), (True, True)):
+        result = estimate(arrival_rate=2, service_rate=1.5, c=3, simulation_time=20, replications=200,
+                          seed=42, antithetic=antithetic, controls=controls)
+        print(f"W(c=3), antithetic={antithetic}, controls={controls}: "
+              f"{result['mean']:.4f} ± {result['half_width']:.4f}")
@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+from scipy.special import ndtri
+
+# Random variates for inter-arrival and service times, drawn in blocks.
+#
+# Calling a NumPy generator once per customer costs far more than the
+# variate itself, so a VariateSource fills a block of a few thousand values
+# at a time and hands them out one by one. Each role (arrivals, services)
+# gets its own generator, spawned from one SeedSequence per replication
+# (see queue_engine.make_streams).
+#
+# Distributions only need a mean and a vectorized sample(rng, size). All of
+# them work with the InverseTransformGenerator of antithetic runs: the
+# non-exponential ones are written as monotone transforms of uniforms or
+# of standard exponentials.
+
+
+class Exponential:
+    def __init__(self, rate):
+        self.rate = rate
+        self.mean = 1 / rate
+
+    def sample(self, rng, size):
+        return rng.exponential(self.mean, size=size)
+
+    def __repr__(self):
+        return f"Exponential(rate={self.rate})"
+
+
+class Erlang:
+    """Sum of k exponential phases, with the given overall mean."""
+
+    def __init__(self, k, mean):
+        self.k = k
+        self.mean = mean
+
+    def sample(self, rng, size):
+        return rng.standard_exponential((size, self.k)).sum(axis=1) * (self.mean / self.k)
+
+    def __repr__(self):
+        return f"Erlang(k={self.k}, mean={self.mean})"
+
+
+class Lognormal:
+    """Lognormal with the given mean and standard deviation (not those of its log)."""
+
+    def __init__(self, mean, std):
+        self.mean = mean
+        self.std = std
+        self.sigma = math.sqrt(math.log1p((std / mean) ** 2))
+        self.mu = math.log(mean) - self.sigma ** 2 / 2
+
+    def sample(self, rng, size):
+        return np.exp(self.mu + self.sigma * ndtri(rng.random(size)))
+
+    def __repr__(self):
+        return f"Lognormal(mean={self.mean}, std={self.std})"
+
+
+class Empirical:
+    """Resamples observed values, e.g. measured service times."""
+
+    def __init__(self, values):
+        self.values = np.sort(np.asarray(values, dtype=np.float64))
+        self.mean = float(self.values.mean())
+
+    def sample(self, rng, size):
+        # Inverse of the empirical CDF, so U and 1 - U pick mirrored order statistics
+        index = (rng.random(size) * len(self.values)).astype(np.int64)
+        return self.values[np.minimum(index, len(self.values) - 1)]
+
+    def __repr__(self):
+        return f"Empirical(n={len(self.values)})"
+
+
+class Uniform:
+    def __init__(self, low=0.0, high=1.0):
+        self.low = low
+        self.high = high
+        self.mean = (low + high) / 2
+
+    def sample(self, rng, size):
+        return self.low + (self.high - self.low) * rng.random(size)
+
+    def __repr__(self):
+        return f"Uniform(low={self.low}, high={self.high})"
+
+
+class Categorical:
+    """Class labels 0..k-1 drawn with the given probabilities."""
+
+    def __init__(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.probabilities = probabilities / probabilities.sum()
+        self.cumulative = np.cumsum(self.probabilities)
+        self.mean = float(np.dot(np.arange(len(probabilities)), self.probabilities))
+
+    def sample(self, rng, size):
+        index = np.searchsorted(self.cumulative, rng.random(size), side='right')
+        return np.minimum(index, len(self.cumulative) - 1)
+
+    def __repr__(self):
+        return f"Categorical({self.probabilities.tolist()})"
+
+
+def is_distribution(value):
+    return hasattr(value, 'sample')
+
+
+def as_distribution(value):
+    """Distributions pass through; a plain rate means exponential times."""
+    return value if is_distribution(value) else Exponential(value)
+
+
+def generator_state(rng):
+    """Bit-generator state of a NumPy Generator or of an InverseTransformGenerator around one."""
+    return getattr(rng, 'rng', rng).bit_generator.state
+
+
+def set_generator_state(rng, state):
+    getattr(rng, 'rng', rng).bit_generator.state = state
+
+
+class VariateSource:
+    """Hands out variates of one distribution from one generator, block by block."""
+
+    def __init__(self, rng, distribution, block_size=4096):
+        self.rng = rng
+        self.distribution = as_distribution(distribution)
+        self.block_size = block_size
+        self.block = []
+        self.position = 0
+
+    def next(self):
+        if self.position == len(self.block):
+            self.block = self.distribution.sample(self.rng, self.block_size).tolist()
+            self.position = 0
+        value = self.block[self.position]
+        self.position += 1
+        return value
+
+    def state(self):
+        """Generator state and the unused rest of the block, to continue the same sequence later."""
+        return {'rng': generator_state(self.rng), 'block': np.array(self.block[self.position:])}
+
+    def load_state(self, state):
+        set_generator_state(self.rng, state['rng'])
+        self.block = np.asarray(state['block']).tolist()
+        self.position = 0